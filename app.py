@@ -8,14 +8,33 @@ import streamlit as st
 import json
 import sys
 import os
+import functools
+import io
+import operator
+import uuid
+import dataclasses
+from dataclasses import dataclass
+import matplotlib
+# Backend non interactif (rendu serveur) : à fixer avant tout import de pyplot
+matplotlib.use('Agg')
 from run_optimization import run_optimization
 
+# orjson (optionnel) : encodage/décodage JSON plus rapide, repli sur json sinon
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
 # === GESTION DES PARAMÈTRES PAR DÉFAUT ===
 DEFAULT_PARAMS_FILE = 'default_params.json'
 
+@st.cache_data(show_spinner=False)
 def load_default_params():
-    """Charge les paramètres par défaut depuis le fichier JSON"""
+    """Charge les paramètres par défaut depuis le fichier JSON (mis en cache entre les reruns)"""
     if os.path.exists(DEFAULT_PARAMS_FILE):
+        if _json_fast is not None:
+            with open(DEFAULT_PARAMS_FILE, 'rb') as f:
+                return _json_fast.loads(f.read())
         with open(DEFAULT_PARAMS_FILE, 'r') as f:
             return json.load(f)
     else:
@@ -53,52 +72,286 @@ def load_default_params():
 
 def save_default_params(params):
     """Sauvegarde les paramètres par défaut dans le fichier JSON"""
+    # Encodage en une seule chaîne puis une seule écriture (json.dump fait de nombreux petits write)
+    params_str = json.dumps(params, indent=2)
     with open(DEFAULT_PARAMS_FILE, 'w') as f:
-        json.dump(params, f, indent=2)
+        f.write(params_str)
+    # Invalider le cache pour que les prochaines sessions relisent le fichier
+    load_default_params.clear()
+
+@st.cache_data(show_spinner=False)
+def _params_json(items):
+    """Export JSON des paramètres de session (items = tuple de paires, clé de cache hachable)"""
+    params = dict(items)
+    if _json_fast is not None:
+        return _json_fast.dumps(params, option=_json_fast.OPT_INDENT_2)
+    return json.dumps(params, indent=2).encode()
+
+# === IMPORTS DIFFÉRÉS ===
+# pandas / matplotlib ne sont chargés qu'au premier affichage de résultats
+@functools.cache
+def _get_pd():
+    """Import différé de pandas (onglet STATISTIQUES)"""
+    import pandas
+    return pandas
+
+@functools.cache
+def _get_viz():
+    """Import différé de visualize_warehouse (onglet VISUALISATION)"""
+    import visualize_warehouse
+    return visualize_warehouse
+
+# Correspondance paramètre de session → chemin dans default_params.json
+_PARAM_MAP = (
+    # OR-Tools Solver
+    ('random_seed', 'solver', 'random_seed'),
+    ('num_search_workers', 'solver', 'num_search_workers'),
+    ('max_time_seconds', 'solver', 'max_time_seconds'),
+    
+    # Gestion collisions
+    ('max_iterations', 'collision', 'max_iterations'),
+    ('depot_time_minutes', 'collision', 'depot_time_minutes'),
+    
+    # Coûts horaires (€/h)
+    ('cost_robot', 'costs', 'robot_per_hour'),
+    ('cost_human', 'costs', 'human_per_hour'),
+    ('cost_cart', 'costs', 'cart_per_hour'),
+    
+    # Capacités & Vitesses (depuis agents.json)
+    ('capacity_robot', 'agents', 'robot', 'capacity_weight'),
+    ('capacity_robot_volume', 'agents', 'robot', 'capacity_volume'),
+    ('speed_robot', 'agents', 'robot', 'speed'),
+    
+    ('capacity_human', 'agents', 'human', 'capacity_weight'),
+    ('capacity_human_volume', 'agents', 'human', 'capacity_volume'),
+    ('speed_human', 'agents', 'human', 'speed'),
+    
+    ('capacity_cart', 'agents', 'cart', 'capacity_weight'),
+    ('capacity_cart_volume', 'agents', 'cart', 'capacity_volume'),
+    ('speed_cart', 'agents', 'cart', 'speed'),
+    
+    # Temporel
+    ('start_hour', 'temporal', 'start_hour'),
+    ('picking_time_sec', 'temporal', 'picking_time_seconds'),
+    
+    # Entrepôt
+    ('warehouse_width', 'warehouse', 'width'),
+    ('warehouse_height', 'warehouse', 'height'),
+)
+
+@dataclass
+class Params:
+    """Paramètres de session (un attribut par entrée de _PARAM_MAP)"""
+    # OR-Tools Solver
+    random_seed: int
+    num_search_workers: int
+    max_time_seconds: int
+    
+    # Gestion collisions
+    max_iterations: int
+    depot_time_minutes: int
+    
+    # Coûts horaires (€/h)
+    cost_robot: float
+    cost_human: float
+    cost_cart: float
+    
+    # Capacités & Vitesses (depuis agents.json)
+    capacity_robot: int
+    capacity_robot_volume: int
+    speed_robot: float
+    
+    capacity_human: int
+    capacity_human_volume: int
+    speed_human: float
+    
+    capacity_cart: int
+    capacity_cart_volume: int
+    speed_cart: float
+    
+    # Temporel
+    start_hour: int
+    picking_time_sec: int
+    
+    # Entrepôt
+    warehouse_width: int
+    warehouse_height: int
+
+# Widgets de l'onglet PARAMÈTRES : (titre, légende, lignes)
+# ligne = (titre de ligne ou None, widgets)
+# widget = (label, paramètre, min, max, pas, aide, clé du widget)
+_PARAM_WIDGETS = (
+    ("🔧 Paramètres du Solver OR-Tools", "⚙️ Plus de threads = plus rapide. Temps élevé = meilleure solution.", (
+        (None, (
+            ("Random Seed", 'random_seed', 0, 99999, 1, "Graine aléatoire pour résultats reproductibles", None),
+            ("Nombre de threads", 'num_search_workers', 1, 16, 1, "Nombre de threads parallèles pour le solver", None),
+            ("Temps max résolution (sec)", 'max_time_seconds', 10, 600, 10, "Temps maximum alloué au solver", None),
+        )),
+    )),
+    ("🚨 Gestion des Collisions", "🚨 250 itérations recommandées. Plus d'itérations = plus de chances de résoudre toutes les collisions.", (
+        (None, (
+            ("Nombre max d'itérations", 'max_iterations', 10, 500, 10, "Nombre max de tentatives pour résoudre les collisions", None),
+            ("Temps au dépôt (min)", 'depot_time_minutes', 1, 10, 1, "Temps passé au dépôt pour déposer les produits", None),
+        )),
+    )),
+    ("💰 Coûts Horaires des Agents", "💰 Valeurs actuelles extraites de run_optimization.py", (
+        (None, (
+            ("Coût Robot (€/h)", 'cost_robot', 0.0, 100.0, 0.5, None, None),
+            ("Coût Humain (€/h)", 'cost_human', 0.0, 100.0, 0.5, None, None),
+            ("Coût Chariot (€/h)", 'cost_cart', 0.0, 100.0, 0.5, None, None),
+        )),
+    )),
+    ("🏃 Vitesses et Capacités des Agents", "📊 Valeurs actuelles extraites de agents.json", (
+        ("Robots", (
+            ("Vitesse (m/s)", 'speed_robot', 0.1, 5.0, 0.1, None, 'speed_robot'),
+            ("Capacité poids (kg)", 'capacity_robot', 1, 100, 1, None, 'cap_robot'),
+            ("Capacité volume (dm³)", 'capacity_robot_volume', 1, 200, 1, None, 'vol_robot'),
+        )),
+        ("Humains", (
+            ("Vitesse (m/s)", 'speed_human', 0.1, 5.0, 0.1, None, 'speed_human'),
+            ("Capacité poids (kg)", 'capacity_human', 1, 100, 1, None, 'cap_human'),
+            ("Capacité volume (dm³)", 'capacity_human_volume', 1, 200, 1, None, 'vol_human'),
+        )),
+        ("Chariots", (
+            ("Vitesse (m/s)", 'speed_cart', 0.1, 5.0, 0.1, None, 'speed_cart'),
+            ("Capacité poids (kg)", 'capacity_cart', 1, 200, 5, None, 'cap_cart'),
+            ("Capacité volume (dm³)", 'capacity_cart_volume', 1, 200, 5, None, 'vol_cart'),
+        )),
+    )),
+    ("⏰ Paramètres Temporels", None, (
+        (None, (
+            ("Heure de début (h)", 'start_hour', 0, 23, 1, None, None),
+            ("Temps de picking (sec)", 'picking_time_sec', 5, 300, 5, None, None),
+        )),
+    )),
+    ("📏 Dimensions de l'Entrepôt", "📏 Valeurs actuelles de warehouse.json (11×10)", (
+        (None, (
+            ("Largeur (cases)", 'warehouse_width', 5, 50, 1, None, None),
+            ("Hauteur (cases)", 'warehouse_height', 5, 50, 1, None, None),
+        )),
+    )),
+)
+
+@st.cache_data(show_spinner=False)
+def _flatten_defaults(d):
+    """Aplatit les paramètres par défaut imbriqués en paramètres de session (mis en cache)"""
+    return {flat: functools.reduce(operator.getitem, path, d) for flat, *path in _PARAM_MAP}
+
+def _unflatten(params):
+    """Reconstruit la structure imbriquée de default_params.json depuis un Params (inverse de _flatten_defaults)"""
+    nested = {}
+    for flat_key, *path, leaf in _PARAM_MAP:
+        functools.reduce(lambda node, key: node.setdefault(key, {}), path, nested)[leaf] = getattr(params, flat_key)
+    return nested
+
+def _warehouse_key(warehouse):
+    """Clé stable du plan de l'entrepôt : dimensions + empreinte des zones (coords en ndarray, cf. load_warehouse)"""
+    dims = warehouse['dimensions']
+    zones = warehouse.get('zones', {})
+    return (dims['width'], dims['height'], hash(tuple(
+        (name, zone['coords'].tobytes() if hasattr(zone['coords'], 'tobytes') else json.dumps(zone['coords']))
+        for name, zone in sorted(zones.items())
+    )))
+
+@st.cache_resource(show_spinner=False)
+def _warehouse_background(warehouse_key, _warehouse):
+    """Fond de plan RGBA de l'entrepôt, partagé entre résultats et sélections d'agents"""
+    viz = _get_viz()
+    return viz.warehouse_background(viz.compute_warehouse_cells(_warehouse))
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=16)
+def _render_map_png(_result, result_key, selected_agent, show_grid, show_legend):
+    """
+    Carte de l'entrepôt avec les trajectoires, rendue en PNG (mise en cache)
+    
+    Seuls les octets du PNG sont partagés entre sessions : la figure matplotlib
+    (dessin Agg non thread-safe) reste locale à cet appel.
+    
+    Args:
+        _result: résultat de run_optimization (non haché, identifié par result_key)
+        result_key: clé stable identifiant le résultat
+        selected_agent: agent sélectionné ou 'Tous les agents'
+        show_grid: afficher la grille (True/False)
+        show_legend: afficher la légende des zones (True/False)
+    
+    Returns:
+        bytes: image PNG de la carte
+    """
+    viz = _get_viz()
+    
+    # Créer la carte (fond de plan précalculé et mis en cache)
+    warehouse = _result['warehouse']
+    background = _warehouse_background(_warehouse_key(warehouse), warehouse)
+    fig, ax = viz.create_warehouse_map(warehouse, show_grid=show_grid, background=background)
+    
+    # Dessiner les trajectoires
+    trajectories = _result['collision_result']['trajectories']
+    depot_positions_all = _result['collision_result']['depot_positions']
+    agents_dict = _result['agents_by_id']
+    agent_rgba = _result['agent_rgba']  # Couleurs précalculées, dans l'ordre de trajectories
+    
+    if selected_agent == 'Tous les agents':
+        # Afficher tous les agents (polylignes regroupées en un seul LineCollection)
+        viz.add_agents_trajectories(ax, trajectories, agent_rgba, alpha=0.5, depot_positions_all=depot_positions_all)
+    else:
+        # Afficher un seul agent
+        if selected_agent in trajectories:
+            agent = agents_dict[selected_agent]
+            color = agent_rgba[list(trajectories).index(selected_agent)]
+            depot_pos = depot_positions_all.get(selected_agent, [])
+            viz.add_agent_trajectory(ax, trajectories[selected_agent], selected_agent, agent['type'], color, alpha=0.8, depot_positions=depot_pos)
+    
+    if show_legend:
+        viz.add_warehouse_legend(ax)
+    fig.tight_layout()
+    
+    # Mêmes options d'export que st.pyplot
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight')
+    return buffer.getvalue()
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=16)
+def _cached_run(num_orders, params_key, max_iterations):
+    """
+    Lance run_optimization, mis en cache sur (nombre de commandes, paramètres)
+    
+    Args:
+        num_orders: nombre de commandes à traiter
+        params_key: tuple des paramètres de session (clé de cache)
+        max_iterations: nombre max d'itérations pour résoudre les collisions
+    
+    Returns:
+        dict résultat de run_optimization, enrichi pour l'affichage
+    """
+    # Pas de processus spawn sous streamlit run : ils réimporteraient le script de l'app
+    result = run_optimization(num_orders, max_iterations=max_iterations, parallel=False)
+    
+    if result['status'] == 'success':
+        viz = _get_viz()
+        
+        # Trajectoires compactées en tableaux int16 (M, 2) : session_state plus léger
+        trajectories = result['collision_result']['trajectories']
+        for agent_id, trajectory in trajectories.items():
+            trajectories[agent_id] = viz.trajectory_array(trajectory)
+        
+        # Clé stable du résultat (sert au cache de la carte)
+        result['result_key'] = uuid.uuid4().hex
+        # Couleurs RGBA des trajectoires calculées une fois par résultat
+        result['agent_rgba'] = viz.agent_colors_rgba([
+            result['agents_by_id'][agent_id]['type']
+            for agent_id in trajectories
+        ])
+    
+    return result
 
 # === INITIALISATION DES PARAMÈTRES ===
 if 'params' not in st.session_state:
     default_params = load_default_params()
-    st.session_state['params'] = {
-        # OR-Tools Solver
-        'random_seed': default_params['solver']['random_seed'],
-        'num_search_workers': default_params['solver']['num_search_workers'],
-        'max_time_seconds': default_params['solver']['max_time_seconds'],
-        
-        # Gestion collisions
-        'max_iterations': default_params['collision']['max_iterations'],
-        'depot_time_minutes': default_params['collision']['depot_time_minutes'],
-        
-        # Coûts horaires (€/h)
-        'cost_robot': default_params['costs']['robot_per_hour'],
-        'cost_human': default_params['costs']['human_per_hour'],
-        'cost_cart': default_params['costs']['cart_per_hour'],
-        
-        # Capacités & Vitesses (depuis agents.json)
-        'capacity_robot': default_params['agents']['robot']['capacity_weight'],
-        'capacity_robot_volume': default_params['agents']['robot']['capacity_volume'],
-        'speed_robot': default_params['agents']['robot']['speed'],
-        
-        'capacity_human': default_params['agents']['human']['capacity_weight'],
-        'capacity_human_volume': default_params['agents']['human']['capacity_volume'],
-        'speed_human': default_params['agents']['human']['speed'],
-        
-        'capacity_cart': default_params['agents']['cart']['capacity_weight'],
-        'capacity_cart_volume': default_params['agents']['cart']['capacity_volume'],
-        'speed_cart': default_params['agents']['cart']['speed'],
-        
-        # Temporel
-        'start_hour': default_params['temporal']['start_hour'],
-        'picking_time_sec': default_params['temporal']['picking_time_seconds'],
-        
-        # Entrepôt
-        'warehouse_width': default_params['warehouse']['width'],
-        'warehouse_height': default_params['warehouse']['height'],
-    }
-
-# Stocker aussi les paramètres par défaut d'origine
-if 'default_params_original' not in st.session_state:
-    st.session_state['default_params_original'] = load_default_params()
+    st.session_state['params'] = Params(**_flatten_defaults(default_params))
+    
+    # Stocker aussi les paramètres par défaut d'origine (même lecture, pas de 2e parsing)
+    if 'default_params_original' not in st.session_state:
+        st.session_state['default_params_original'] = default_params
 
 # Configuration de la page
 st.set_page_config(
@@ -128,10 +381,12 @@ num_orders = st.sidebar.number_input(
 if st.sidebar.button("🚀 LANCER L'OPTIMISATION", type="primary"):
     with st.spinner(f"⏳ Optimisation de {num_orders} commandes en cours..."):
         try:
-            # Lancer l'optimisation avec les paramètres configurés
-            result = run_optimization(
+            # Lancer l'optimisation avec les paramètres configurés (mise en cache)
+            params = st.session_state['params']
+            result = _cached_run(
                 num_orders,
-                max_iterations=st.session_state['params']['max_iterations']
+                dataclasses.astuple(params),
+                params.max_iterations
             )
             
             if result['status'] == 'success':
@@ -151,14 +406,22 @@ st.sidebar.divider()
 st.sidebar.subheader("ℹ️ Système")
 st.sidebar.caption("Stratégie : MIN_TIME")
 st.sidebar.caption("A* Pathfinding : ✓ Actif")
-st.sidebar.caption(f"Max iterations : {st.session_state['params']['max_iterations']}")
+st.sidebar.caption(f"Max iterations : {st.session_state['params'].max_iterations}")
 st.sidebar.caption("Version : 1.0.0")
 
 # === ONGLETS PRINCIPAUX ===
-tab1, tab2, tab3 = st.tabs(["📊 STATISTIQUES", "🗺️ VISUALISATION", "⚙️ PARAMÈTRES"])
+# Sélecteur horizontal plutôt que st.tabs : seul l'onglet affiché est exécuté à chaque rerun
+TAB_STATS, TAB_VIZ, TAB_PARAMS = "📊 STATISTIQUES", "🗺️ VISUALISATION", "⚙️ PARAMÈTRES"
+current_tab = st.radio(
+    "Onglet",
+    [TAB_STATS, TAB_VIZ, TAB_PARAMS],
+    horizontal=True,
+    label_visibility="collapsed",
+    key='current_tab'
+)
 
 # === ONGLET 1 : STATISTIQUES ===
-with tab1:
+if current_tab == TAB_STATS:
     st.header("📊 Statistiques de l'Optimisation")
     
     if 'optimization_done' not in st.session_state or 'result' not in st.session_state:
@@ -207,23 +470,26 @@ with tab1:
         # === DISTRIBUTION DES AGENTS ===
         st.subheader("👥 Distribution des Agents")
         
-        import pandas as pd
-        
-        agent_data = []
-        for stat in result['agent_stats']:
-            agent_data.append({
-                'Agent': stat['id'],
-                'Type': stat['type'].upper(),
-                'Produits': stat['nb_produits'],
-                'Voyages': stat['nb_voyages'],
-                'Début': stat['debut'],
-                'Fin': stat['fin'],
-                'Durée (min)': stat['duree_min'],
-                'Coût (€)': f"{stat['cout']:.2f}",
-                'Délai (min)': stat['delay']
-            })
+        pd = _get_pd()
         
-        df = pd.DataFrame(agent_data)
+        # Construction colonne par colonne (pas de boucle Python ligne par ligne)
+        df = pd.DataFrame.from_records(
+            result['agent_stats'],
+            columns=['id', 'type', 'nb_produits', 'nb_voyages', 'debut', 'fin', 'duree_min', 'cout', 'delay']
+        )
+        df['type'] = df['type'].str.upper()
+        df['cout'] = df['cout'].map('{:.2f}'.format)
+        df = df.rename(columns={
+            'id': 'Agent',
+            'type': 'Type',
+            'nb_produits': 'Produits',
+            'nb_voyages': 'Voyages',
+            'debut': 'Début',
+            'fin': 'Fin',
+            'duree_min': 'Durée (min)',
+            'cout': 'Coût (€)',
+            'delay': 'Délai (min)'
+        })
         
         # Afficher avec style
         st.dataframe(
@@ -262,16 +528,17 @@ with tab1:
                 st.caption("❌ Trop de collisions ! Considérez : réduire les commandes, augmenter les délais, ou modifier la stratégie.")
         
         with col2:
-            total_delay = sum(stat['delay'] for stat in result['agent_stats'])
+            # Somme vectorisée sur la colonne du DataFrame déjà construit
+            total_delay = int(df['Délai (min)'].sum())
             st.metric("Délais appliqués", f"{total_delay} min", help="Temps total de décalage appliqué aux agents pour éviter les collisions")
             
             # Nombre d'itérations utilisées
             if result['total_collisions'] > 0:
-                st.caption(f"⚙️ {st.session_state['params']['max_iterations']} itérations utilisées")
+                st.caption(f"⚙️ {st.session_state['params'].max_iterations} itérations utilisées")
                 st.caption("💡 Si collisions persistent, augmenter max_iterations dans l'onglet PARAMÈTRES.")
 
 # === ONGLET 2 : VISUALISATION ===
-with tab2:
+elif current_tab == TAB_VIZ:
     st.header("🗺️ Visualisation de l'Entrepôt")
     
     if 'optimization_done' not in st.session_state or 'result' not in st.session_state:
@@ -305,47 +572,11 @@ with tab2:
         # === CARTE ===
         st.subheader("🗺️ Carte de l'Entrepôt")
         
-        from visualize_warehouse import create_warehouse_map, add_agent_trajectory, add_warehouse_legend
-        import matplotlib.pyplot as plt
-        
-        # Créer la carte
-        fig, ax = create_warehouse_map(result['warehouse'], show_grid=show_grid)
+        # Carte + trajectoires + légende mises en cache (un PNG par combinaison d'options)
+        map_png = _render_map_png(result, result['result_key'], selected_agent, show_grid, show_legend)
         
-        # Couleurs des agents
-        agent_colors = {
-            'robot': '#FF4444',  # Rouge
-            'human': '#4444FF',  # Bleu
-            'cart': '#FF8800'    # Orange
-        }
-        
-        # Dessiner les trajectoires
-        trajectories = result['collision_result']['trajectories']
-        depot_positions_all = result['collision_result']['depot_positions']
-        agents_dict = {a['id']: a for a in result['agents']}
-        
-        if selected_agent == 'Tous les agents':
-            # Afficher tous les agents
-            for agent_id, trajectory in trajectories.items():
-                agent = agents_dict[agent_id]
-                color = agent_colors.get(agent['type'], '#666666')
-                depot_pos = depot_positions_all.get(agent_id, [])
-                add_agent_trajectory(ax, trajectory, agent_id, agent['type'], color, alpha=0.5, depot_positions=depot_pos)
-        else:
-            # Afficher un seul agent
-            if selected_agent in trajectories:
-                agent = agents_dict[selected_agent]
-                color = agent_colors.get(agent['type'], '#666666')
-                depot_pos = depot_positions_all.get(selected_agent, [])
-                add_agent_trajectory(ax, trajectories[selected_agent], selected_agent, agent['type'], color, alpha=0.8, depot_positions=depot_pos)
-        
-        # Ajouter la légende si demandée
-        if show_legend:
-            add_warehouse_legend(ax)
-        
-        # Afficher la figure
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close()
+        # Afficher la carte
+        st.image(map_png)
         
         # === LÉGENDE DES MARQUEURS ===
         st.divider()
@@ -390,212 +621,39 @@ with tab2:
                     st.metric("Coût", f"{agent_stat['cout']:.2f}€")
 
 # === ONGLET 3 : PARAMÈTRES ===
-with tab3:
+elif current_tab == TAB_PARAMS:
     st.header("⚙️ Paramètres du Système")
     
-    st.info("💡 **Attention** : Les modifications prennent effet lors de la prochaine optimisation.")
-    
-    # === SECTION 1 : OPTIMISATION OR-TOOLS ===
-    st.subheader("🔧 Paramètres du Solver OR-Tools")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        random_seed = st.number_input(
-            "Random Seed",
-            min_value=0,
-            max_value=99999,
-            value=st.session_state['params']['random_seed'],
-            step=1,
-            help="Graine aléatoire pour résultats reproductibles"
-        )
-        st.session_state['params']['random_seed'] = random_seed
-    
-    with col2:
-        num_threads = st.number_input(
-            "Nombre de threads",
-            min_value=1,
-            max_value=16,
-            value=st.session_state['params']['num_search_workers'],
-            step=1,
-            help="Nombre de threads parallèles pour le solver"
-        )
-        st.session_state['params']['num_search_workers'] = num_threads
-    
-    with col3:
-        max_time_seconds = st.number_input(
-            "Temps max résolution (sec)",
-            min_value=10,
-            max_value=600,
-            value=st.session_state['params']['max_time_seconds'],
-            step=10,
-            help="Temps maximum alloué au solver"
-        )
-        st.session_state['params']['max_time_seconds'] = max_time_seconds
-    
-    st.caption("⚙️ Plus de threads = plus rapide. Temps élevé = meilleure solution.")
-    
-    st.divider()
-    
-    # === SECTION 2 : GESTION DES COLLISIONS ===
-    st.subheader("🚨 Gestion des Collisions")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        max_iterations = st.number_input(
-            "Nombre max d'itérations",
-            min_value=10,
-            max_value=500,
-            value=st.session_state['params']['max_iterations'],
-            step=10,
-            help="Nombre max de tentatives pour résoudre les collisions"
-        )
-        st.session_state['params']['max_iterations'] = max_iterations
-    
-    with col2:
-        depot_time = st.number_input(
-            "Temps au dépôt (min)",
-            min_value=1,
-            max_value=10,
-            value=st.session_state['params']['depot_time_minutes'],
-            step=1,
-            help="Temps passé au dépôt pour déposer les produits"
-        )
-        st.session_state['params']['depot_time_minutes'] = depot_time
-    
-    st.caption("🚨 250 itérations recommandées. Plus d'itérations = plus de chances de résoudre toutes les collisions.")
-    
-    st.divider()
-    
-    # === SECTION 3 : COÛTS HORAIRES ===
-    st.subheader("💰 Coûts Horaires des Agents")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        cost_robot = st.number_input(
-            "Coût Robot (€/h)",
-            min_value=0.0,
-            max_value=100.0,
-            value=st.session_state['params']['cost_robot'],
-            step=0.5
-        )
-        st.session_state['params']['cost_robot'] = cost_robot
-    
-    with col2:
-        cost_human = st.number_input(
-            "Coût Humain (€/h)",
-            min_value=0.0,
-            max_value=100.0,
-            value=st.session_state['params']['cost_human'],
-            step=0.5
-        )
-        st.session_state['params']['cost_human'] = cost_human
-    
-    with col3:
-        cost_cart = st.number_input(
-            "Coût Chariot (€/h)",
-            min_value=0.0,
-            max_value=100.0,
-            value=st.session_state['params']['cost_cart'],
-            step=0.5
-        )
-        st.session_state['params']['cost_cart'] = cost_cart
-    
-    st.caption("💰 Valeurs actuelles extraites de run_optimization.py")
-    
-    st.divider()
-    
-    # === SECTION 4 : VITESSES ET CAPACITÉS ===
-    st.subheader("🏃 Vitesses et Capacités des Agents")
-    
-    st.write("**Robots**")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.session_state['params']['speed_robot'] = st.number_input("Vitesse (m/s)", min_value=0.1, max_value=5.0, value=st.session_state['params']['speed_robot'], step=0.1, key='speed_robot')
-    with col2:
-        st.session_state['params']['capacity_robot'] = st.number_input("Capacité poids (kg)", min_value=1, max_value=100, value=st.session_state['params']['capacity_robot'], step=1, key='cap_robot')
-    with col3:
-        st.session_state['params']['capacity_robot_volume'] = st.number_input("Capacité volume (dm³)", min_value=1, max_value=200, value=st.session_state['params']['capacity_robot_volume'], step=1, key='vol_robot')
-    
-    st.write("**Humains**")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.session_state['params']['speed_human'] = st.number_input("Vitesse (m/s)", min_value=0.1, max_value=5.0, value=st.session_state['params']['speed_human'], step=0.1, key='speed_human')
-    with col2:
-        st.session_state['params']['capacity_human'] = st.number_input("Capacité poids (kg)", min_value=1, max_value=100, value=st.session_state['params']['capacity_human'], step=1, key='cap_human')
-    with col3:
-        st.session_state['params']['capacity_human_volume'] = st.number_input("Capacité volume (dm³)", min_value=1, max_value=200, value=st.session_state['params']['capacity_human_volume'], step=1, key='vol_human')
-    
-    st.write("**Chariots**")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.session_state['params']['speed_cart'] = st.number_input("Vitesse (m/s)", min_value=0.1, max_value=5.0, value=st.session_state['params']['speed_cart'], step=0.1, key='speed_cart')
-    with col2:
-        st.session_state['params']['capacity_cart'] = st.number_input("Capacité poids (kg)", min_value=1, max_value=200, value=st.session_state['params']['capacity_cart'], step=5, key='cap_cart')
-    with col3:
-        st.session_state['params']['capacity_cart_volume'] = st.number_input("Capacité volume (dm³)", min_value=1, max_value=200, value=st.session_state['params']['capacity_cart_volume'], step=5, key='vol_cart')
-    
-    st.caption("📊 Valeurs actuelles extraites de agents.json")
-    
-    st.divider()
-    
-    # === SECTION 5 : TEMPOREL ===
-    st.subheader("⏰ Paramètres Temporels")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        start_hour = st.number_input(
-            "Heure de début (h)",
-            min_value=0,
-            max_value=23,
-            value=st.session_state['params']['start_hour'],
-            step=1
-        )
-        st.session_state['params']['start_hour'] = start_hour
-    
-    with col2:
-        picking_time = st.number_input(
-            "Temps de picking (sec)",
-            min_value=5,
-            max_value=300,
-            value=st.session_state['params']['picking_time_sec'],
-            step=5
-        )
-        st.session_state['params']['picking_time_sec'] = picking_time
-    
-    st.divider()
-    
-    # === SECTION 6 : ENTREPÔT ===
-    st.subheader("📏 Dimensions de l'Entrepôt")
+    # Alias local : même objet que st.session_state['params'] (setattr le modifie en place)
+    p = st.session_state['params']
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        warehouse_width = st.number_input(
-            "Largeur (cases)",
-            min_value=5,
-            max_value=50,
-            value=st.session_state['params']['warehouse_width'],
-            step=1
-        )
-        st.session_state['params']['warehouse_width'] = warehouse_width
-    
-    with col2:
-        warehouse_height = st.number_input(
-            "Hauteur (cases)",
-            min_value=5,
-            max_value=50,
-            value=st.session_state['params']['warehouse_height'],
-            step=1
-        )
-        st.session_state['params']['warehouse_height'] = warehouse_height
-    
-    st.caption("📏 Valeurs actuelles de warehouse.json (11×10)")
+    st.info("💡 **Attention** : Les modifications prennent effet lors de la prochaine optimisation.")
     
-    st.divider()
+    # === SECTIONS 1 à 6 : WIDGETS GÉNÉRÉS DEPUIS _PARAM_WIDGETS ===
+    for title, caption, rows in _PARAM_WIDGETS:
+        st.subheader(title)
+        
+        for row_title, widgets in rows:
+            if row_title:
+                st.write(f"**{row_title}**")
+            
+            for col, (label, name, min_value, max_value, step, help_text, widget_key) in zip(st.columns(len(widgets)), widgets):
+                with col:
+                    value = st.number_input(
+                        label,
+                        min_value=min_value,
+                        max_value=max_value,
+                        value=getattr(p, name),
+                        step=step,
+                        help=help_text,
+                        key=widget_key
+                    )
+                    setattr(p, name, value)
+        
+        if caption:
+            st.caption(caption)
+        
+        st.divider()
     
     # === BOUTONS D'ACTION ===
     st.subheader("💾 Actions")
@@ -604,29 +662,7 @@ with tab3:
     
     with col1:
         if st.button("🔄 Réinitialiser aux valeurs par défaut", type="secondary"):
-            st.session_state['params'] = {
-                'random_seed': st.session_state['default_params_original']['solver']['random_seed'],
-                'num_search_workers': st.session_state['default_params_original']['solver']['num_search_workers'],
-                'max_time_seconds': st.session_state['default_params_original']['solver']['max_time_seconds'],
-                'max_iterations': st.session_state['default_params_original']['collision']['max_iterations'],
-                'depot_time_minutes': st.session_state['default_params_original']['collision']['depot_time_minutes'],
-                'cost_robot': st.session_state['default_params_original']['costs']['robot_per_hour'],
-                'cost_human': st.session_state['default_params_original']['costs']['human_per_hour'],
-                'cost_cart': st.session_state['default_params_original']['costs']['cart_per_hour'],
-                'capacity_robot': st.session_state['default_params_original']['agents']['robot']['capacity_weight'],
-                'capacity_robot_volume': st.session_state['default_params_original']['agents']['robot']['capacity_volume'],
-                'speed_robot': st.session_state['default_params_original']['agents']['robot']['speed'],
-                'capacity_human': st.session_state['default_params_original']['agents']['human']['capacity_weight'],
-                'capacity_human_volume': st.session_state['default_params_original']['agents']['human']['capacity_volume'],
-                'speed_human': st.session_state['default_params_original']['agents']['human']['speed'],
-                'capacity_cart': st.session_state['default_params_original']['agents']['cart']['capacity_weight'],
-                'capacity_cart_volume': st.session_state['default_params_original']['agents']['cart']['capacity_volume'],
-                'speed_cart': st.session_state['default_params_original']['agents']['cart']['speed'],
-                'start_hour': st.session_state['default_params_original']['temporal']['start_hour'],
-                'picking_time_sec': st.session_state['default_params_original']['temporal']['picking_time_seconds'],
-                'warehouse_width': st.session_state['default_params_original']['warehouse']['width'],
-                'warehouse_height': st.session_state['default_params_original']['warehouse']['height'],
-            }
+            st.session_state['params'] = Params(**_flatten_defaults(st.session_state['default_params_original']))
             st.success("✓ Paramètres réinitialisés aux valeurs par défaut d'origine !")
             st.rerun()
     
@@ -637,53 +673,16 @@ with tab3:
                 "_comment": "Paramètres par défaut OPTIPICK - Mis à jour",
                 "_version": "1.0",
                 "_last_updated": "2026-02-20",
-                "solver": {
-                    "random_seed": st.session_state['params']['random_seed'],
-                    "num_search_workers": st.session_state['params']['num_search_workers'],
-                    "max_time_seconds": st.session_state['params']['max_time_seconds']
-                },
-                "collision": {
-                    "max_iterations": st.session_state['params']['max_iterations'],
-                    "depot_time_minutes": st.session_state['params']['depot_time_minutes']
-                },
-                "costs": {
-                    "robot_per_hour": st.session_state['params']['cost_robot'],
-                    "human_per_hour": st.session_state['params']['cost_human'],
-                    "cart_per_hour": st.session_state['params']['cost_cart']
-                },
-                "agents": {
-                    "robot": {
-                        "capacity_weight": st.session_state['params']['capacity_robot'],
-                        "capacity_volume": st.session_state['params']['capacity_robot_volume'],
-                        "speed": st.session_state['params']['speed_robot']
-                    },
-                    "human": {
-                        "capacity_weight": st.session_state['params']['capacity_human'],
-                        "capacity_volume": st.session_state['params']['capacity_human_volume'],
-                        "speed": st.session_state['params']['speed_human']
-                    },
-                    "cart": {
-                        "capacity_weight": st.session_state['params']['capacity_cart'],
-                        "capacity_volume": st.session_state['params']['capacity_cart_volume'],
-                        "speed": st.session_state['params']['speed_cart']
-                    }
-                },
-                "temporal": {
-                    "start_hour": st.session_state['params']['start_hour'],
-                    "picking_time_seconds": st.session_state['params']['picking_time_sec']
-                },
-                "warehouse": {
-                    "width": st.session_state['params']['warehouse_width'],
-                    "height": st.session_state['params']['warehouse_height'],
-                    "entry_point": [6, 10]
-                }
+                **_unflatten(p)
             }
+            new_defaults['warehouse']['entry_point'] = [6, 10]
             save_default_params(new_defaults)
             st.session_state['default_params_original'] = new_defaults
             st.success("✓ Les paramètres actuels sont maintenant les nouveaux paramètres par défaut !")
     
     with col3:
-        params_json = json.dumps(st.session_state['params'], indent=2)
+        # Sérialisation mise en cache : recalculée uniquement quand les paramètres changent
+        params_json = _params_json(tuple(dataclasses.asdict(p).items()))
         st.download_button(
             label="📥 Exporter (JSON)",
             data=params_json,
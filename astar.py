@@ -3,7 +3,14 @@ A* Pathfinding pour OPTIPICK
 Trouve le plus court chemin en évitant les obstacles
 """
 
-import heapq
+import weakref
+from functools import lru_cache
+import numpy as np
+from numba import njit
+
+
+# 4 directions possibles (dx, dy), pas de diagonale : haut, bas, gauche, droite
+DIRECTIONS = ((0, 1), (0, -1), (-1, 0), (1, 0))
 
 
 def manhattan_distance(pos1, pos2):
@@ -20,61 +27,568 @@ def get_neighbors(pos, grid):
     
     Args:
         pos: [x, y] position actuelle (coordonnées 1-based)
-        grid: grille de navigation (indices 0-based)
+        grid: grille de navigation (indices 0-based), liste ou ndarray
     
     Returns:
         Liste de positions [x, y] voisines traversables
     """
     x, y = pos
-    height = len(grid)
-    width = len(grid[0]) if height > 0 else 0
-    
-    # 4 directions possibles (pas de diagonale)
-    directions = [
-        (0, 1),   # Haut
-        (0, -1),  # Bas
-        (-1, 0),  # Gauche
-        (1, 0)    # Droite
-    ]
+    grid = np.asarray(grid, dtype=np.uint8)
+    height, width = grid.shape
+    
+    # Position hors grille : aucun voisin exploitable
+    if not (1 <= x <= width and 1 <= y <= height):
+        return []
+    
+    neighbors = get_neighbors_idx((height - y) * width + x - 1, grid, width, height,
+                                  np.empty(4, dtype=np.int32))
+    # Conversion des indices à plat en [x, y] 1-based
+    return [[int(idx % width) + 1, height - int(idx // width)] for idx in neighbors if idx != -1]
+
+
+# === NOYAU A* COMPILÉ ===
+# Directions dans la grille (ligne, colonne), dans l'ordre de DIRECTIONS
+# (donc mêmes chemins en cas d'égalité)
+_DIR_ROW = np.array([-dy for dx, dy in DIRECTIONS], dtype=np.int32)
+_DIR_COL = np.array([dx for dx, dy in DIRECTIONS], dtype=np.int32)
+
+# Tables de saut par grille : {id(grid): (weakref(grid), tables)}
+_JUMP_TABLES = {}
+
+# Chemins mémoïsés par grille : {id(grid): (weakref(grid), recherche lru_cache)}
+_PATH_CACHES = {}
+_PATH_CACHE_SIZE = 100_000
+
+# g_score d'une case jamais atteinte
+_UNREACHED = np.iinfo(np.int32).max
+
+
+@njit(cache=True)
+def get_neighbors_idx(idx, grid, width, height, out):
+    """
+    Voisins traversables de la case idx (indice à plat grid_y * width + grid_x)
+    
+    Args:
+        out: ndarray int32[4] réutilisé d'un appel à l'autre
+    
+    Returns:
+        out rempli dans l'ordre de DIRECTIONS, -1 si pas de voisin dans
+        cette direction (hors grille ou bloqué)
+    """
+    row = idx // width
+    col = idx % width
+    for k in range(4):
+        n_row = row + _DIR_ROW[k]
+        n_col = col + _DIR_COL[k]
+        if 0 <= n_row < height and 0 <= n_col < width and grid[n_row, n_col] == 1:
+            out[k] = n_row * width + n_col
+        else:
+            out[k] = -1
+    return out
+
+
+@njit(cache=True)
+def _padded_walkable(grid):
+    """
+    Grille à plat entourée d'une bordure bloquée : un voisin hors grille
+    tombe sur la bordure, les noyaux n'ont plus de test de limites à faire
+    
+    Returns:
+        tuple (walkable, offsets) : ndarray uint8 ((height+2) * (width+2))
+        indexé (grid_y+1) * (width+2) + grid_x+1, et les 4 décalages à plat
+        des voisins dans l'ordre de DIRECTIONS
+    """
+    height, width = grid.shape
+    padded_width = width + 2
+    walkable = np.zeros((height + 2) * padded_width, dtype=np.uint8)
+    for row in range(height):
+        base = (row + 1) * padded_width + 1
+        for col in range(width):
+            walkable[base + col] = grid[row, col]
+    
+    offsets = np.empty(4, dtype=np.int64)
+    for k in range(4):
+        offsets[k] = _DIR_ROW[k] * padded_width + _DIR_COL[k]
+    return walkable, offsets
+
+
+@njit(cache=True)
+def _bucket_push(heads, tails, items, nexts, n_entries, f, item):
+    """
+    Ajoute item en fin du seau f (file de Dial : un seau par f_score entier)
+    
+    Returns:
+        int: nombre d'entrées utilisées
+    """
+    items[n_entries] = item
+    nexts[n_entries] = -1
+    if heads[f] == -1:
+        heads[f] = n_entries
+    else:
+        nexts[tails[f]] = n_entries
+    tails[f] = n_entries
+    return n_entries + 1
+
+
+@njit(cache=True)
+def _bucket_pop(heads, nexts, items, min_f):
+    """
+    Retire la plus ancienne entrée du premier seau non vide à partir de min_f
+    (les f_score extraits sont croissants avec une heuristique consistante)
+    
+    Returns:
+        tuple (item, f du seau, qui devient le nouveau min_f)
+    """
+    while heads[min_f] == -1:
+        min_f += 1
+    entry = heads[min_f]
+    heads[min_f] = nexts[entry]
+    return items[entry], min_f
+
+
+@njit(cache=True)
+def _is_forced(grid, row, col, d_row, d_col):
+    """
+    Vrai si (row + d_row, col) est un voisin forcé de (row, col) atteinte par
+    un mouvement horizontal d_col : case libre alors que la case
+    correspondante de la colonne précédente est bloquée
+    """
+    n_row = row + d_row
+    return 0 <= n_row < grid.shape[0] and grid[n_row, col] == 1 \
+        and grid[n_row, col - d_col] != 1
+
+
+# Indices des tables de saut (voir jump_tables)
+_RIGHT, _LEFT, _DOWN, _UP = 0, 1, 2, 3
+
+
+@njit(cache=True)
+def _build_jump_tables(grid):
+    """
+    Tables de saut d'une grille uint8 (voir jump_tables)
+    
+    Returns:
+        ndarray int16 (4, height, width)
+    """
+    height, width = grid.shape
+    tables = np.empty((4, height, width), dtype=np.int16)
+    
+    for row in range(height):
+        # Vers la droite : premier arrêt strictement après col
+        stop = width
+        for col in range(width - 1, -1, -1):
+            tables[_RIGHT, row, col] = stop
+            if grid[row, col] != 1 or (col >= 1 and (_is_forced(grid, row, col, -1, 1)
+                                                     or _is_forced(grid, row, col, 1, 1))):
+                stop = col
+        # Vers la gauche : premier arrêt strictement avant col
+        stop = -1
+        for col in range(width):
+            tables[_LEFT, row, col] = stop
+            if grid[row, col] != 1 or (col + 1 < width and (_is_forced(grid, row, col, -1, -1)
+                                                             or _is_forced(grid, row, col, 1, -1))):
+                stop = col
     
-    neighbors = []
-    for dx, dy in directions:
-        new_x = x + dx
-        new_y = y + dy
+    for col in range(width):
+        # Verticalement : premier obstacle strictement après / avant row
+        wall = height
+        for row in range(height - 1, -1, -1):
+            tables[_DOWN, row, col] = wall
+            if grid[row, col] != 1:
+                wall = row
+        wall = -1
+        for row in range(height):
+            tables[_UP, row, col] = wall
+            if grid[row, col] != 1:
+                wall = row
+    
+    return tables
+
+
+@njit(cache=True)
+def _jump_horizontal(grid, tables, row, col, d_col, end_row, end_col):
+    """
+    Saut depuis (row, col) dans la direction horizontale d_col jusqu'au
+    prochain point de saut (destination ou voisin vertical forcé), lu en
+    O(1) dans les tables de saut
+    
+    Returns:
+        int: colonne du point de saut, -1 si un obstacle est atteint avant
+    """
+    stop = tables[_RIGHT if d_col == 1 else _LEFT, row, col]
+    
+    # Destination sur le segment, avant (ou sur) l'arrêt
+    if row == end_row and (end_col - col) * d_col > 0 and (stop - end_col) * d_col >= 0:
+        return end_col
+    
+    # Arrêt = bord, obstacle, ou case libre avec voisin forcé
+    if stop < 0 or stop >= grid.shape[1] or grid[row, stop] != 1:
+        return -1
+    return stop
+
+
+@njit(cache=True)
+def _jump_vertical(grid, tables, row, col, d_row, end_row, end_col):
+    """
+    Avance depuis (row, col) dans la direction verticale d_row jusqu'au
+    prochain obstacle (lu dans les tables de saut) ; une case est un point
+    de saut si c'est la destination ou si un saut horizontal depuis elle
+    trouve un point de saut
+    
+    Returns:
+        int: ligne du point de saut, -1 si un obstacle est atteint avant
+    """
+    wall = tables[_DOWN if d_row == 1 else _UP, row, col]
+    row += d_row
+    while row != wall:
+        if row == end_row and col == end_col:
+            return row
+        if _jump_horizontal(grid, tables, row, col, -1, end_row, end_col) != -1 \
+                or _jump_horizontal(grid, tables, row, col, 1, end_row, end_col) != -1:
+            return row
+        row += d_row
+    return -1
+
+
+@njit(cache=True)
+def _identify_successors(grid, tables, current, parent, end_row, end_col, successors):
+    """
+    Points de saut atteignables depuis current (Jump Point Search 4-connexe)
+    
+    Ordre canonique : les mouvements verticaux se prolongent et ouvrent des
+    balayages horizontaux ; un mouvement horizontal ne tourne que vers un
+    voisin forcé. Les chemins symétriques à travers les zones ouvertes ne
+    sont donc développés qu'une seule fois.
+    
+    Returns:
+        int: nombre de successeurs écrits dans successors
+    """
+    width = grid.shape[1]
+    row = current // width
+    col = current % width
+    n_succ = 0
+    
+    if parent == -1:
+        # Case de départ : les 4 directions
+        d_rows = (-1, 1)
+        d_cols = (-1, 1)
+    elif parent // width == row:
+        # Mouvement horizontal : continuer tout droit + voisins forcés
+        d_col = 1 if col > parent % width else -1
+        d_rows = (-1 if _is_forced(grid, row, col, -1, d_col) else 0,
+                  1 if _is_forced(grid, row, col, 1, d_col) else 0)
+        d_cols = (d_col, 0)
+    else:
+        # Mouvement vertical : continuer tout droit + balayages horizontaux
+        d_rows = (1 if row > parent // width else -1, 0)
+        d_cols = (-1, 1)
+    
+    for d_row in d_rows:
+        if d_row != 0:
+            n_row = _jump_vertical(grid, tables, row, col, d_row, end_row, end_col)
+            if n_row != -1:
+                successors[n_succ] = n_row * width + col
+                n_succ += 1
+    
+    for d_col in d_cols:
+        if d_col != 0:
+            n_col = _jump_horizontal(grid, tables, row, col, d_col, end_row, end_col)
+            if n_col != -1:
+                successors[n_succ] = row * width + n_col
+                n_succ += 1
+    
+    return n_succ
+
+
+@njit(cache=True)
+def _jps_kernel(grid, tables, start_idx, end_idx):
+    """
+    A* sur les points de saut (Jump Point Search) d'une grille uint8
+    (1=traversable), cases indexées à plat (idx = grid_y * width + grid_x)
+    
+    L'open set est une file à seaux indexée par f_score : insertion et
+    extraction en O(1). Les points de saut sont reliés par des segments
+    droits dont le coût est leur longueur en cases.
+    
+    Returns:
+        ndarray int32 (L, 2) des positions [x, y] 1-based (vide si aucun chemin)
+    """
+    height, width = grid.shape
+    n_cells = height * width
+    end_row = end_idx // width
+    end_col = end_idx % width
+    
+    came_from = np.full(n_cells, -1, dtype=np.int32)
+    g_score = np.full(n_cells, _UNREACHED, dtype=np.int32)
+    closed = np.zeros(n_cells, dtype=np.bool_)
+    successors = np.empty(4, dtype=np.int32)
+    
+    # f_score = g + h < n_cells + 2 * (height + width)
+    n_buckets = n_cells + 2 * (height + width)
+    heads = np.full(n_buckets, -1, dtype=np.int32)
+    tails = np.empty(n_buckets, dtype=np.int32)
+    # Au plus 4 successeurs par case développée (+1 pour start)
+    items = np.empty(4 * n_cells + 1, dtype=np.int32)
+    nexts = np.empty(4 * n_cells + 1, dtype=np.int32)
+    n_entries = _bucket_push(heads, tails, items, nexts, 0, 0, start_idx)
+    size = 1
+    min_f = 0
+    g_score[start_idx] = 0
+    
+    while size > 0:
+        current, min_f = _bucket_pop(heads, nexts, items, min_f)
+        size -= 1
+        
+        # Si on a atteint la destination : reconstruire le chemin case par
+        # case en remplissant les segments entre points de saut
+        if current == end_idx:
+            path = np.empty((g_score[current] + 1, 2), dtype=np.int32)
+            i = len(path) - 1
+            node = current
+            row = node // width
+            col = node % width
+            while came_from[node] != -1:
+                prev = came_from[node]
+                p_row = prev // width
+                p_col = prev % width
+                step_row = np.sign(p_row - row)
+                step_col = np.sign(p_col - col)
+                while row != p_row or col != p_col:
+                    path[i, 0] = col + 1
+                    path[i, 1] = height - row
+                    i -= 1
+                    row += step_row
+                    col += step_col
+                node = prev
+            path[0, 0] = col + 1
+            path[0, 1] = height - row
+            return path
         
-        # Vérifier que la nouvelle position est dans les limites
-        if 1 <= new_x <= width and 1 <= new_y <= height:
-            # Convertir en indices 0-based pour accéder à la grille
-            grid_x = new_x - 1
-            grid_y = height - new_y
+        # Entrée périmée : case déjà développée avec un meilleur g_score
+        if closed[current]:
+            continue
+        
+        closed[current] = True
+        row = current // width
+        col = current % width
+        n_succ = _identify_successors(grid, tables, current, came_from[current],
+                                      end_row, end_col, successors)
+        
+        for s in range(n_succ):
+            neighbor = successors[s]
+            if closed[neighbor]:
+                continue
             
-            # Vérifier que la case est traversable
-            if grid[grid_y][grid_x] == 1:
-                neighbors.append([new_x, new_y])
+            n_row = neighbor // width
+            n_col = neighbor % width
+            tentative_g = g_score[current] + abs(n_row - row) + abs(n_col - col)
+            
+            # Si on a trouvé un meilleur chemin vers le point de saut
+            if tentative_g < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g
+                f = tentative_g + abs(n_row - end_row) + abs(n_col - end_col)
+                n_entries = _bucket_push(heads, tails, items, nexts,
+                                         n_entries, f, neighbor)
+                size += 1
     
-    return neighbors
+    return np.empty((0, 2), dtype=np.int32)
 
 
-def astar_path(start, end, grid):
+@njit(cache=True)
+def _bucket_peek(heads, min_f):
+    """
+    Returns:
+        int: f_score du premier seau non vide à partir de min_f
+    """
+    while heads[min_f] == -1:
+        min_f += 1
+    return min_f
+
+
+@njit(cache=True)
+def _bidirectional_kernel(grid, start_idx, end_idx):
+    """
+    A* bidirectionnel case par case : un front depuis start (heuristique
+    vers end), un front depuis end (heuristique vers start), développés à
+    tour de rôle. mu est le meilleur chemin trouvé à la rencontre des
+    fronts ; on s'arrête dès que max(f_min avant, f_min arrière) >= mu.
+    
+    Returns:
+        int: longueur du plus court chemin en cases, -1 si aucun chemin
+    """
+    height, width = grid.shape
+    walkable, offsets = _padded_walkable(grid)
+    padded_width = width + 2
+    n_cells = walkable.size
+    n_buckets = n_cells + height + width
+    n_items = 4 * n_cells + 1
+    
+    # Index 0 = front avant (depuis start), 1 = front arrière (depuis end)
+    g_score = np.full((2, n_cells), _UNREACHED, dtype=np.int32)
+    closed = np.zeros((2, n_cells), dtype=np.bool_)
+    heads = np.full((2, n_buckets), -1, dtype=np.int32)
+    tails = np.empty((2, n_buckets), dtype=np.int32)
+    items = np.empty((2, n_items), dtype=np.int32)
+    nexts = np.empty((2, n_items), dtype=np.int32)
+    
+    # Indices à plat dans la grille bordée
+    start_idx = (start_idx // width + 1) * padded_width + start_idx % width + 1
+    end_idx = (end_idx // width + 1) * padded_width + end_idx % width + 1
+    sources = (start_idx, end_idx)
+    targets = (end_idx, start_idx)
+    n_entries = np.zeros(2, dtype=np.int64)
+    sizes = np.ones(2, dtype=np.int64)
+    min_f = np.zeros(2, dtype=np.int64)
+    for side in range(2):
+        g_score[side, sources[side]] = 0
+        n_entries[side] = _bucket_push(heads[side], tails[side], items[side],
+                                       nexts[side], 0, 0, sources[side])
+    
+    mu = _UNREACHED
+    side = 1
+    while sizes[0] > 0 and sizes[1] > 0:
+        min_f[0] = _bucket_peek(heads[0], min_f[0])
+        min_f[1] = _bucket_peek(heads[1], min_f[1])
+        if max(min_f[0], min_f[1]) >= mu:
+            break
+        
+        side = 1 - side
+        current, min_f[side] = _bucket_pop(heads[side], nexts[side], items[side], min_f[side])
+        sizes[side] -= 1
+        
+        # Entrée périmée : case déjà développée avec un meilleur g_score
+        if closed[side, current]:
+            continue
+        
+        closed[side, current] = True
+        target_row = targets[side] // padded_width
+        target_col = targets[side] % padded_width
+        tentative_g = g_score[side, current] + 1  # Coût = 1 par case
+        
+        for k in range(4):
+            neighbor = current + offsets[k]
+            if walkable[neighbor] == 0:
+                continue
+            if closed[side, neighbor] or tentative_g >= g_score[side, neighbor]:
+                continue
+            
+            g_score[side, neighbor] = tentative_g
+            f = tentative_g + abs(neighbor // padded_width - target_row) \
+                + abs(neighbor % padded_width - target_col)
+            n_entries[side] = _bucket_push(heads[side], tails[side], items[side],
+                                           nexts[side], n_entries[side], f, neighbor)
+            sizes[side] += 1
+            
+            # Rencontre des deux fronts
+            other_g = g_score[1 - side, neighbor]
+            if other_g != _UNREACHED and tentative_g + other_g < mu:
+                mu = tentative_g + other_g
+    
+    return -1 if mu == _UNREACHED else mu
+
+
+@njit(cache=True)
+def _bfs_kernel(grid, src_row, src_col):
+    """
+    Parcours en largeur depuis (src_row, src_col) sur une grille uint8
+    
+    Returns:
+        ndarray int32 (height, width) des distances, -1 si inatteignable
+    """
+    height, width = grid.shape
+    walkable, offsets = _padded_walkable(grid)
+    padded_width = width + 2
+    field = np.full(walkable.size, -1, dtype=np.int32)
+    queue = np.empty(height * width, dtype=np.int32)
+    
+    queue[0] = (src_row + 1) * padded_width + src_col + 1
+    field[queue[0]] = 0
+    head = 0
+    tail = 1
+    
+    while head < tail:
+        current = queue[head]
+        head += 1
+        dist = field[current] + 1
+        
+        for k in range(4):
+            neighbor = current + offsets[k]
+            if walkable[neighbor] == 0 or field[neighbor] != -1:
+                continue
+            field[neighbor] = dist
+            queue[tail] = neighbor
+            tail += 1
+    
+    # Retrait de la bordure
+    return field.reshape(height + 2, padded_width)[1:-1, 1:-1].copy()
+
+
+def bfs_distance_field(src, grid):
     """
-    Algorithme A* pour trouver le plus court chemin
+    Distances (en cases) de src vers toutes les cases de la grille,
+    en un seul parcours en largeur (coût uniforme = 1 par case)
     
     Args:
-        start: [x, y] position de départ (coordonnées 1-based)
-        end: [x, y] position d'arrivée (coordonnées 1-based)
-        grid: grille de navigation [[0/1, ...], ...]
+        src: [x, y] position source (coordonnées 1-based)
+        grid: grille de navigation [[0/1, ...], ...] ou ndarray déjà converti
     
     Returns:
-        Liste de positions [[x, y], ...] du chemin (incluant start et end)
-        Retourne None si aucun chemin n'existe
+        ndarray int32 (height, width) indexé [grid_y, grid_x],
+        -1 pour les cases inatteignables (ou toutes si src est bloquée)
     """
-    # Si start == end, retourner un chemin d'une seule case
-    if start == end:
-        return [start]
+    grid = np.asarray(grid, dtype=np.uint8)
+    height, width = grid.shape
+    src_grid_x = src[0] - 1
+    src_grid_y = height - src[1]
     
-    # Vérifier que start et end sont traversables
-    height = len(grid)
-    width = len(grid[0]) if height > 0 else 0
+    if not (0 <= src_grid_x < width and 0 <= src_grid_y < height) \
+            or grid[src_grid_y, src_grid_x] == 0:
+        return np.full((height, width), -1, dtype=np.int32)
+    
+    return _bfs_kernel(grid, src_grid_y, src_grid_x)
+
+
+def jump_tables(grid):
+    """
+    Tables de saut de la grille, calculées une fois par grille puis réutilisées
+    
+    Pour chaque case (grid_y, grid_x) :
+    - [_RIGHT] / [_LEFT] : première colonne strictement à droite / à gauche
+      qui arrête un saut horizontal (obstacle ou voisin vertical forcé),
+      width / -1 si aucune
+    - [_DOWN] / [_UP] : première ligne strictement en dessous / au-dessus
+      bloquée, height / -1 si aucune
+    
+    Args:
+        grid: grille de navigation [[0/1, ...], ...] ou ndarray
+    
+    Returns:
+        ndarray int16 (4, height, width)
+    """
+    grid = np.asarray(grid, dtype=np.uint8)
+    key = id(grid)
+    cached = _JUMP_TABLES.get(key)
+    if cached is not None and cached[0]() is grid:
+        return cached[1]
+    
+    tables = _build_jump_tables(grid)
+    # L'entrée disparaît avec la grille (pas de réutilisation d'id périmée)
+    _JUMP_TABLES[key] = (weakref.ref(grid, lambda _, key=key: _JUMP_TABLES.pop(key, None)), tables)
+    return tables
+
+
+def _flat_indices(start, end, grid):
+    """
+    Convertit la grille en ndarray uint8 (sans copie si déjà convertie) et
+    start/end en indices à plat, après avoir vérifié qu'ils sont traversables
+    
+    Returns:
+        tuple (grid, start_idx, end_idx), ou None (avec message) si start ou
+        end est hors limites ou bloquée
+    """
+    grid = np.asarray(grid, dtype=np.uint8)
+    height, width = grid.shape
     
     start_grid_x = start[0] - 1
     start_grid_y = height - start[1]
@@ -89,73 +603,104 @@ def astar_path(start, end, grid):
         print(f"⚠️  End position {end} hors limites")
         return None
     
-    if grid[start_grid_y][start_grid_x] == 0:
+    if grid[start_grid_y, start_grid_x] == 0:
         print(f"⚠️  Start position {start} est bloquée")
         return None
     
-    if grid[end_grid_y][end_grid_x] == 0:
+    if grid[end_grid_y, end_grid_x] == 0:
         print(f"⚠️  End position {end} est bloquée")
         return None
     
-    # Initialisation A*
-    # Priority queue : (f_score, counter, position)
-    counter = 0  # Pour départager les positions avec même f_score
-    open_set = []
-    heapq.heappush(open_set, (0, counter, tuple(start)))
+    return grid, start_grid_y * width + start_grid_x, end_grid_y * width + end_grid_x
+
+
+def _path_array(start, end, grid):
+    """
+    Chemin JPS de start à end sous forme de tableau
     
-    # Dictionnaires pour A*
-    came_from = {}  # came_from[pos] = position précédente
-    g_score = {tuple(start): 0}  # g_score[pos] = coût depuis start
-    f_score = {tuple(start): manhattan_distance(start, end)}  # f_score[pos] = g + h
+    Returns:
+        ndarray int32 (L, 2) de positions [x, y], ou None si aucun chemin
+    """
+    # Si start == end, retourner un chemin d'une seule case
+    if start == end:
+        return np.array([start], dtype=np.int32)
     
-    # Ensemble des positions déjà évaluées
-    closed_set = set()
+    # Vérifier que start et end sont traversables
+    checked = _flat_indices(start, end, grid)
+    if checked is None:
+        return None
     
-    while open_set:
-        # Prendre la position avec le plus petit f_score
-        current_f, _, current = heapq.heappop(open_set)
-        current = list(current)  # Convertir tuple en list
-        
-        # Si on a atteint la destination
-        if current == end:
-            # Reconstruire le chemin
-            path = [end]
-            while tuple(path[-1]) in came_from:
-                path.append(came_from[tuple(path[-1])])
-            path.reverse()
-            return path
-        
-        closed_set.add(tuple(current))
-        
-        # Explorer les voisins
-        for neighbor in get_neighbors(current, grid):
-            neighbor_tuple = tuple(neighbor)
-            
-            if neighbor_tuple in closed_set:
-                continue
-            
-            # Coût pour atteindre le voisin depuis start
-            tentative_g = g_score[tuple(current)] + 1  # Coût = 1 par case
-            
-            # Si on a trouvé un meilleur chemin vers le voisin
-            if neighbor_tuple not in g_score or tentative_g < g_score[neighbor_tuple]:
-                came_from[neighbor_tuple] = current
-                g_score[neighbor_tuple] = tentative_g
-                f = tentative_g + manhattan_distance(neighbor, end)
-                f_score[neighbor_tuple] = f
-                
-                # Ajouter à open_set si pas déjà présent
-                counter += 1
-                heapq.heappush(open_set, (f, counter, neighbor_tuple))
-    
-    # Aucun chemin trouvé
-    print(f"⚠️  Aucun chemin trouvé de {start} à {end}")
-    return None
+    grid, start_idx, end_idx = checked
+    path = _jps_kernel(grid, jump_tables(grid), start_idx, end_idx)
+    
+    if len(path) == 0:
+        # Aucun chemin trouvé
+        print(f"⚠️  Aucun chemin trouvé de {start} à {end}")
+        return None
+    
+    return path
+
+
+def astar_path(start, end, grid):
+    """
+    Algorithme A* pour trouver le plus court chemin, développé sur les
+    points de saut (Jump Point Search) plutôt que case par case
+    
+    Args:
+        start: [x, y] position de départ (coordonnées 1-based)
+        end: [x, y] position d'arrivée (coordonnées 1-based)
+        grid: grille de navigation [[0/1, ...], ...] ou ndarray déjà converti
+    
+    Returns:
+        Liste de positions [[x, y], ...] du chemin (incluant start et end)
+        Retourne None si aucun chemin n'existe
+    """
+    path = _path_array(start, end, grid)
+    return None if path is None else path.tolist()
+
+
+def astar_path_cached(start, end, grid):
+    """
+    astar_path mémoïsé par (start, end) pour chaque grille : les mêmes
+    trajets (produit → dépôt, dépôt → entry point...) reviennent d'un
+    agent et d'un appel à l'autre
+    
+    Args:
+        start: [x, y] position de départ (coordonnées 1-based)
+        end: [x, y] position d'arrivée (coordonnées 1-based)
+        grid: grille de navigation, ndarray de préférence (une liste est
+            reconvertie à chaque appel et ne profite donc pas du cache)
+    
+    Returns:
+        ndarray int32 (L, 2) en lecture seule, partagé entre les appels,
+        ou None si aucun chemin n'existe
+    """
+    grid = np.asarray(grid, dtype=np.uint8)
+    key = id(grid)
+    cached = _PATH_CACHES.get(key)
+    if cached is None or cached[0]() is not grid:
+        # L'entrée disparaît avec la grille ; la recherche ne garde qu'une
+        # référence faible pour ne pas la maintenir en vie
+        grid_ref = weakref.ref(grid, lambda _, key=key: _PATH_CACHES.pop(key, None))
+        cached = (grid_ref, lru_cache(maxsize=_PATH_CACHE_SIZE)(
+            lambda start_t, end_t: _frozen_path(start_t, end_t, grid_ref())
+        ))
+        _PATH_CACHES[key] = cached
+    return cached[1](tuple(start), tuple(end))
+
+
+def _frozen_path(start, end, grid):
+    """Chemin de _path_array passé en lecture seule (partagé par le cache)"""
+    path = _path_array(list(start), list(end), grid)
+    if path is not None:
+        path.flags.writeable = False
+    return path
 
 
 def calculate_distance(start, end, grid):
     """
     Calcule la distance (nombre de cases) entre deux positions
+    par A* bidirectionnel (sans reconstruire le chemin)
     
     Args:
         start: [x, y] position de départ
@@ -165,14 +710,21 @@ def calculate_distance(start, end, grid):
     Returns:
         int: nombre de cases du chemin (ou distance Manhattan si pas de chemin)
     """
-    path = astar_path(start, end, grid)
+    if start == end:
+        return 0
     
-    if path is None:
+    checked = _flat_indices(start, end, grid)
+    if checked is None:
         # Fallback sur Manhattan si pas de chemin
         return manhattan_distance(start, end)
     
-    # Distance = nombre de cases - 1 (on ne compte pas la case de départ)
-    return len(path) - 1
+    dist = _bidirectional_kernel(*checked)
+    
+    if dist == -1:
+        print(f"⚠️  Aucun chemin trouvé de {start} à {end}")
+        return manhattan_distance(start, end)
+    
+    return int(dist)
 
 
 # === TESTS ===
@@ -1,6 +1,11 @@
 import json
-from distances import manhattan_distance
-from astar import astar_path
+import numpy as np
+from numba import njit
+from astar import astar_path_cached
+
+
+# Valeur des lignes de trajectoire sans position (minutes avant le départ)
+SENTINEL = -1
 
 
 def calculate_agent_trajectory(agent, products_route, entry_point, distance_data, start_delay=0, navigation_grid=None, assigned_depot=None):
@@ -18,46 +23,57 @@ def calculate_agent_trajectory(agent, products_route, entry_point, distance_data
         assigned_depot: [x, y] case de dépôt assignée à cet agent (unique)
     
     Returns:
-        dict {minute: [x, y]} - position de l'agent à chaque minute
-        list: positions des dépôts effectués [[x,y], ...]
+        np.ndarray int16 (T, 2) - position [x, y] de l'agent à chaque minute
+            (ligne = minute, SENTINEL avant le départ)
+        list: positions des dépôts effectués [(x, y), ...]
     """
-    trajectory = {}
     depot_positions = []  # Pour marquer les dépôts
     
-    # Vitesse de l'agent (m/min)
-    speed_m_per_min = agent['speed'] * 60  # m/s -> m/min
-    meters_per_cell = 5  # 1 case = 5 mètres
-    cells_per_min = speed_m_per_min / meters_per_cell
+    # Tableau dense minute → position, agrandi par doublement si nécessaire
+    trajectory = np.full((max(2 * start_delay, 64), 2), SENTINEL, dtype=np.int16)
+    current_time = start_delay
+    
+    def write(positions):
+        """Écrit un bloc de positions consécutives à partir de current_time"""
+        nonlocal trajectory, current_time
+        end_time = current_time + len(positions)
+        if end_time > len(trajectory):
+            grown = np.full((max(2 * len(trajectory), end_time), 2), SENTINEL, dtype=np.int16)
+            grown[:current_time] = trajectory[:current_time]
+            trajectory = grown
+        if positions:
+            trajectory[current_time:end_time] = positions
+        current_time = end_time
+    
+    # Positions en tuples (x, y) : immuables, partagées sans copie
+    entry_point = tuple(entry_point)
     
     # Départ à l'entry point avec délai
-    current_pos = entry_point.copy()
-    current_time = start_delay
+    current_pos = entry_point
     
     # Si pas de dépôt assigné, utiliser [6,5] par défaut (ne devrait pas arriver)
     if assigned_depot is None:
         assigned_depot = [6, 5]
+    assigned_depot = tuple(assigned_depot)
     
     if products_route:
         for i, product_item in enumerate(products_route):
-            target_pos = product_item['product_data']['pickup_location']
+            # pickup_location peut être une ligne d'ndarray (loader) → (x, y)
+            target_pos = tuple(np.asarray(product_item['product_data']['pickup_location']).tolist())
             visit_time = product_item['visit_time'] + start_delay
             
-            # Aller au produit
+            # Aller au produit (jusqu'à la première arrivée sur la case)
             path = calculate_path(current_pos, target_pos, navigation_grid)
-            
-            for step_pos in path:
-                trajectory[current_time] = step_pos.copy()
-                current_time += 1
-                
-                if step_pos == target_pos:
-                    break
+            target_step = list(target_pos)  # les chemins sont des listes [x, y]
+            if target_step in path:
+                path = path[:path.index(target_step) + 1]
+            write(path)
             
             # Rester sur place (picking)
-            while current_time <= visit_time:
-                trajectory[current_time] = target_pos.copy()
-                current_time += 1
+            if current_time <= visit_time:
+                write([target_pos] * (visit_time - current_time + 1))
             
-            current_pos = target_pos.copy()
+            current_pos = target_pos
             
             # === VÉRIFIER SI RETOUR AU DÉPÔT NÉCESSAIRE ===
             is_last_product = (i == len(products_route) - 1)
@@ -69,49 +85,63 @@ def calculate_agent_trajectory(agent, products_route, entry_point, distance_data
                 # Si changement de voyage → retour au dépôt (case assignée)
                 if next_trip != current_trip:
                     # Tracer le retour au dépôt assigné
-                    depot_path = calculate_path(current_pos, assigned_depot, navigation_grid)
-                    for step_pos in depot_path:
-                        trajectory[current_time] = step_pos.copy()
-                        current_time += 1
+                    write(calculate_path(current_pos, assigned_depot, navigation_grid))
                     
                     # Rester 2 min au dépôt
-                    for _ in range(2):
-                        trajectory[current_time] = assigned_depot.copy()
-                        current_time += 1
+                    write([assigned_depot] * 2)
                     
                     # Marquer ce dépôt
-                    depot_positions.append(assigned_depot.copy())
+                    depot_positions.append(assigned_depot)
                     
-                    current_pos = assigned_depot.copy()
+                    current_pos = assigned_depot
             
             # Si c'est le dernier produit → retour au dépôt puis à l'entry point
             elif is_last_product:
                 # 1. Retour au dépôt assigné
-                depot_path = calculate_path(current_pos, assigned_depot, navigation_grid)
-                for step_pos in depot_path:
-                    trajectory[current_time] = step_pos.copy()
-                    current_time += 1
+                write(calculate_path(current_pos, assigned_depot, navigation_grid))
                 
                 # Rester 2 min au dépôt (dépôt final)
-                for _ in range(2):
-                    trajectory[current_time] = assigned_depot.copy()
-                    current_time += 1
+                write([assigned_depot] * 2)
                 
                 # Marquer ce dépôt
-                depot_positions.append(assigned_depot.copy())
+                depot_positions.append(assigned_depot)
                 
-                current_pos = assigned_depot.copy()
+                current_pos = assigned_depot
                 
                 # 2. Retour à l'entry point
-                entry_path = calculate_path(current_pos, entry_point, navigation_grid)
-                for step_pos in entry_path:
-                    trajectory[current_time] = step_pos.copy()
-                    current_time += 1
+                write(calculate_path(current_pos, entry_point, navigation_grid))
                 
                 # Position finale à l'entry point
-                trajectory[current_time] = entry_point.copy()
+                write([entry_point])
+    
+    return trajectory[:current_time], depot_positions
+
+
+def trajectory_minutes(trajectory):
+    """
+    Nombre de minutes de trajet (lignes hors SENTINEL)
+    
+    Args:
+        trajectory: np.ndarray (T, 2) de calculate_agent_trajectory
+    
+    Returns:
+        int
+    """
+    return int(np.count_nonzero(trajectory[:, 0] != SENTINEL))
+
+
+def shift_trajectory(trajectory, delta):
+    """
+    Décale une trajectoire de delta minutes (équivaut à start_delay + delta)
     
-    return trajectory, depot_positions
+    Args:
+        trajectory: np.ndarray (T, 2) indexé par minute
+        delta: décalage en minutes
+    
+    Returns:
+        np.ndarray (T + delta, 2)
+    """
+    return np.concatenate([np.full((delta, 2), SENTINEL, dtype=trajectory.dtype), trajectory])
 
 
 def calculate_path(start, end, navigation_grid=None):
@@ -130,15 +160,15 @@ def calculate_path(start, end, navigation_grid=None):
         list de positions [[x1,y1], [x2,y2], ...]
     """
     if navigation_grid is not None:
-        # Utiliser A* avec obstacles
-        path = astar_path(start, end, navigation_grid)
+        # Utiliser A* avec obstacles (chemins mémoïsés par grille)
+        path = astar_path_cached(start, end, navigation_grid)
         
         if path is None:
             # Fallback sur Manhattan si A* échoue
             print(f"⚠️  A* failed for {start}→{end}, fallback to Manhattan")
             return calculate_path_manhattan(start, end)
         
-        return path
+        return path.tolist()
     else:
         # Fallback sur Manhattan simple
         return calculate_path_manhattan(start, end)
@@ -147,59 +177,150 @@ def calculate_path(start, end, navigation_grid=None):
 def calculate_path_manhattan(start, end):
     """
     Chemin Manhattan simple (X puis Y) - ancien comportement
+    Les deux segments sont construits d'un bloc avec np.arange (start exclu, end inclus)
     """
-    path = []
-    current = start.copy()
+    dx = np.sign(end[0] - start[0])
+    dy = np.sign(end[1] - start[1])
     
-    # Se déplacer d'abord en X, puis en Y
-    while current[0] != end[0]:
-        if current[0] < end[0]:
-            current[0] += 1
-        else:
-            current[0] -= 1
-        path.append(current.copy())
+    # Se déplacer d'abord en X (à y = start[1]), puis en Y (à x = end[0])
+    xs = np.arange(start[0] + dx, end[0] + dx, dx) if dx else np.empty(0, dtype=int)
+    ys = np.arange(start[1] + dy, end[1] + dy, dy) if dy else np.empty(0, dtype=int)
     
-    while current[1] != end[1]:
-        if current[1] < end[1]:
-            current[1] += 1
-        else:
-            current[1] -= 1
-        path.append(current.copy())
+    path = np.column_stack([
+        np.concatenate([xs, np.full(len(ys), end[0])]),
+        np.concatenate([np.full(len(xs), start[1]), ys])
+    ])
     
-    return path
+    return path.tolist()
 
 
-def detect_collisions(agents_trajectories):
+@njit(cache=True)
+def _collision_pairs(cells, present):
+    """
+    Paires d'agents sur la même case à la même minute
+    (comptage, puis remplissage à des positions précalculées)
+    
+    Args:
+        cells: ndarray int32 (T, A) clé de case par (minute, agent)
+        present: ndarray bool (T, A) agent sur la grille à cette minute
+    
+    Returns:
+        ndarray int64 (N, 3) de [agent1, agent2, minute] avec agent1 < agent2
+    """
+    n_minutes, n_agents = cells.shape
+    
+    counts = np.zeros(n_minutes, dtype=np.int64)
+    for t in range(n_minutes):
+        for a in range(n_agents):
+            if present[t, a]:
+                for b in range(a + 1, n_agents):
+                    if present[t, b] and cells[t, a] == cells[t, b]:
+                        counts[t] += 1
+    
+    offsets = np.zeros(n_minutes + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    pairs = np.empty((offsets[-1], 3), dtype=np.int64)
+    
+    for t in range(n_minutes):
+        k = offsets[t]
+        for a in range(n_agents):
+            if present[t, a]:
+                for b in range(a + 1, n_agents):
+                    if present[t, b] and cells[t, a] == cells[t, b]:
+                        pairs[k, 0] = a
+                        pairs[k, 1] = b
+                        pairs[k, 2] = t
+                        k += 1
+    
+    return pairs
+
+
+def collision_pairs(agents_trajectories, delays=None):
+    """
+    Paires d'agents en collision, sous forme d'indices dans agents_trajectories
+    
+    Les positions sont rangées dans un tableau dense (minute, agent) ; les
+    minutes sont ensuite parcourues une à une par un noyau compilé (voir _collision_pairs).
+    
+    Args:
+        agents_trajectories: dict {agent_id: np.ndarray (T, 2) indexé par minute}
+        delays: dict {agent_id: minutes} décalage à appliquer à chaque
+            trajectoire (optionnel, équivaut à shift_trajectory sans copie)
+    
+    Returns:
+        ndarray int64 (N, 3) de [index_agent1, index_agent2, minute],
+        triée par paire d'agents puis par minute
+    """
+    trajectories = list(agents_trajectories.values())
+    offsets = [(delays or {}).get(agent_id, 0) for agent_id in agents_trajectories]
+    t_end = max((offset + len(traj) for offset, traj in zip(offsets, trajectories)), default=0)
+    
+    if len(trajectories) < 2 or t_end == 0:
+        return np.empty((0, 3), dtype=np.int64)
+    
+    # positions[minute, agent] = [x, y], present = agent sur la grille à cette minute
+    positions = np.full((t_end, len(trajectories), 2), SENTINEL, dtype=np.int16)
+    for a_idx, (offset, traj) in enumerate(zip(offsets, trajectories)):
+        positions[offset:offset + len(traj), a_idx] = traj
+    present = positions[..., 0] != SENTINEL
+    
+    # Clé unique par case : (x << 16) | y
+    cells = (positions[..., 0].astype(np.int32) << 16) | (positions[..., 1].astype(np.int32) & 0xFFFF)
+    
+    pairs = _collision_pairs(cells, present)
+    
+    # Tri par paire d'agents puis par minute
+    return pairs[np.lexsort((pairs[:, 2], pairs[:, 1], pairs[:, 0]))]
+
+
+def detect_collisions(agents_trajectories, pairs=None, delays=None):
     """
     Détecte les collisions entre agents
     
     Args:
-        agents_trajectories: dict {agent_id: {minute: [x,y]}}
+        agents_trajectories: dict {agent_id: np.ndarray (T, 2) indexé par minute}
+        pairs: résultat de collision_pairs déjà calculé (optionnel)
+        delays: dict {agent_id: minutes} décalages, comme pour collision_pairs
     
     Returns:
-        list de collisions [(agent1_id, agent2_id, minute, position)]
+        list de collisions [(agent1_id, agent2_id, minute, position)],
+        triée par paire d'agents puis par minute
     """
-    collisions = []
+    if pairs is None:
+        pairs = collision_pairs(agents_trajectories, delays)
+    
     agent_ids = list(agents_trajectories.keys())
+    trajectories = list(agents_trajectories.values())
+    delays = delays or {}
     
-    # Comparer chaque paire d'agents
-    for i, agent1_id in enumerate(agent_ids):
-        for agent2_id in agent_ids[i+1:]:
-            traj1 = agents_trajectories[agent1_id]
-            traj2 = agents_trajectories[agent2_id]
-            
-            # Trouver les minutes communes
-            common_times = set(traj1.keys()) & set(traj2.keys())
-            
-            for t in common_times:
-                pos1 = traj1[t]
-                pos2 = traj2[t]
-                
-                # Collision si même position
-                if pos1 == pos2:
-                    collisions.append((agent1_id, agent2_id, t, pos1))
+    return [
+        (agent_ids[i], agent_ids[j], t, trajectories[i][t - delays.get(agent_ids[i], 0)].tolist())
+        for i, j, t in pairs.tolist()
+    ]
+
+
+def most_colliding(pairs, n_agents):
+    """
+    Index de l'agent impliqué dans le plus de collisions
+    
+    À égalité, l'agent apparu en premier dans pairs l'emporte (même choix
+    que l'ancien max() sur un dict rempli dans l'ordre des collisions).
+    
+    Args:
+        pairs: ndarray (N, 3) de collision_pairs, N > 0
+        n_agents: nombre d'agents
+    
+    Returns:
+        int
+    """
+    involved = pairs[:, :2].ravel()
+    counts = np.bincount(involved, minlength=n_agents)
     
-    return collisions
+    # Agents rangés par première apparition, puis premier maximum
+    agents, first_seen = np.unique(involved, return_index=True)
+    by_appearance = agents[np.argsort(first_seen)]
+    return int(by_appearance[np.argmax(counts[by_appearance])])
+
 
 def check_and_adjust_collisions(solution, agents, entry_point, distance_data, max_iterations=250, navigation_grid=None):
     """
@@ -281,46 +402,48 @@ def check_and_adjust_collisions(solution, agents, entry_point, distance_data, ma
             'start_delay': 0
         }
     
+    # Calculer les trajectoires une seule fois : un délai de départ ne fait
+    # que translater la trajectoire dans le temps (dépôts inchangés). Les
+    # délais restent des décalages, appliqués seulement au résultat final.
+    agents_trajectories, depot_positions_all = compute_all_trajectories(routes_with_delays)
+    delays = {agent_id: 0 for agent_id in agents_trajectories}
+    
     # Itérations pour résoudre collisions
     for iteration in range(max_iterations):
         print(f"\n--- Itération {iteration + 1} ---")
         
-        # Calculer trajectoires
-        agents_trajectories, depot_positions_all = compute_all_trajectories(routes_with_delays)
-        
         for agent_id, traj in agents_trajectories.items():
-            delay = routes_with_delays[agent_id]['start_delay']
-            print(f"{agent_id}: {len(traj)} min de trajet (délai départ: +{delay} min)")
+            delay = delays[agent_id]
+            print(f"{agent_id}: {trajectory_minutes(traj)} min de trajet (délai départ: +{delay} min)")
         
         # Détecter collisions
-        collisions = detect_collisions(agents_trajectories)
+        pairs = collision_pairs(agents_trajectories, delays)
         
-        print(f"🚨 Collisions: {len(collisions)}")
+        print(f"🚨 Collisions: {len(pairs)}")
         
-        if len(collisions) == 0:
+        if len(pairs) == 0:
             print("✅ Aucune collision !")
             break
         
         # Afficher quelques collisions
-        for agent1, agent2, minute, pos in collisions[:5]:
+        for agent1, agent2, minute, pos in detect_collisions(agents_trajectories, pairs[:5], delays):
             time_str = f"{9 + minute//60:02d}:{minute%60:02d}"
             print(f"  ⚠️  {agent1} ⚔️  {agent2} à {time_str} sur {pos}")
         
         # Ajustement : décaler l'agent avec le plus de collisions
-        collision_counts = {}
-        for agent1, agent2, _, _ in collisions:
-            collision_counts[agent1] = collision_counts.get(agent1, 0) + 1
-            collision_counts[agent2] = collision_counts.get(agent2, 0) + 1
-        
-        # Trouver l'agent le plus problématique
-        most_colliding_agent = max(collision_counts, key=collision_counts.get)
+        agent_ids = list(agents_trajectories.keys())
+        most_colliding_agent = agent_ids[most_colliding(pairs, len(agent_ids))]
         
-        # Décaler de 2 minutes
-        routes_with_delays[most_colliding_agent]['start_delay'] += 2
-        print(f"  → Décalage de {most_colliding_agent} : +2 min (total: {routes_with_delays[most_colliding_agent]['start_delay']} min)")
-    
-    # Résultat final
-    final_trajectories, final_depot_positions = compute_all_trajectories(routes_with_delays)
+        # Décaler de 2 minutes (simple mise à jour du décalage)
+        delays[most_colliding_agent] += 2
+        print(f"  → Décalage de {most_colliding_agent} : +2 min (total: {delays[most_colliding_agent]} min)")
+    
+    # Résultat final : trajectoires décalées une seule fois par agent
+    final_trajectories = {
+        agent_id: shift_trajectory(traj, delays[agent_id]) if delays[agent_id] else traj
+        for agent_id, traj in agents_trajectories.items()
+    }
+    final_depot_positions = depot_positions_all
     final_collisions = detect_collisions(final_trajectories)
     
     print(f"\n=== RÉSULTAT FINAL ===")
@@ -329,7 +452,7 @@ def check_and_adjust_collisions(solution, agents, entry_point, distance_data, ma
     return {
         'trajectories': final_trajectories,
         'collisions': final_collisions,
-        'delays': {aid: rd['start_delay'] for aid, rd in routes_with_delays.items()},
+        'delays': delays,
         'depot_positions': final_depot_positions,  # Positions des dépôts par agent
         'depot_assignments': depot_assignments     # Assignation des cases de dépôt
     }
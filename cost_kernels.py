@@ -0,0 +1,38 @@
+"""
+Noyaux numériques du calcul de coût (compilés par numba)
+Importé à la demande par main.compute_total_cost : numba hors du démarrage du CLI
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _total_cost_kernel(last_visits, starts, rates):
+    """
+    Somme des coûts (fin - début) en heures × coût horaire, dans l'ordre
+    des tableaux (même arrondi que l'ancienne boucle)
+    """
+    total = 0.0
+    for k in range(len(rates)):
+        total += (last_visits[k] - starts[k]) / 60.0 * rates[k]
+    return total
+
+
+def total_cost(last_visits, starts, rates):
+    """
+    Coût total en € à partir de listes alignées
+    
+    Args:
+        last_visits: minutes de fin par agent
+        starts: minutes de début par agent
+        rates: coûts horaires par agent (€/h)
+    
+    Returns:
+        float: coût total en €
+    """
+    return float(_total_cost_kernel(
+        np.array(last_visits, dtype=np.int64),
+        np.array(starts, dtype=np.int64),
+        np.array(rates, dtype=np.float64)
+    ))
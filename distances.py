@@ -1,4 +1,5 @@
-from astar import calculate_distance as astar_distance, manhattan_distance
+import numpy as np
+from astar import bfs_distance_field
 
 
 def calculate_distance_matrix(products, entry_point, navigation_grid=None):
@@ -7,19 +8,22 @@ def calculate_distance_matrix(products, entry_point, navigation_grid=None):
     - entry_point (point de départ/arrivée)
     - tous les pickup_locations des produits
     
-    Si navigation_grid est fournie, utilise A* pour éviter les obstacles.
+    Si navigation_grid est fournie, utilise un parcours en largeur (BFS) par
+    source pour éviter les obstacles (mêmes distances que A*).
     Sinon, utilise la distance Manhattan simple.
     
     Args:
         products: liste des produits avec pickup_location
         entry_point: [x, y] point d'entrée
-        navigation_grid: grille [[0/1,...]] optionnelle (0=bloqué, 1=traversable)
+        navigation_grid: grille [[0/1,...]] ou ndarray optionnelle (0=bloqué, 1=traversable)
     
     Returns:
         dict {
             'entry': entry_point,
             'locations': {product_id: pickup_location},
             'distances': {(from, to): distance},
+            'matrix': ndarray int32 (P, P) des mêmes distances,
+            'index': {point: ligne/colonne dans matrix},
             'grid': navigation_grid ou None
         }
     """
@@ -33,31 +37,56 @@ def calculate_distance_matrix(products, entry_point, navigation_grid=None):
     distances = {}
     all_points = list(locations.keys())
     
+    # Coordonnées de tous les points (1-based) : une ligne de la matrice
+    # se calcule d'un coup en vectoriel
+    coords = np.array([locations[key] for key in all_points], dtype=np.int64)
+    
+    # Matrice Manhattan complète (L1) en une seule passe vectorielle
+    matrix = np.abs(coords[:, None, :] - coords[None, :, :]).sum(axis=-1).astype(np.int32)
+    
     use_astar = navigation_grid is not None
     
     if use_astar:
-        print(f"  🗺️  Utilisation de A* avec navigation_grid (évite obstacles)")
+        print(f"  🗺️  Utilisation de navigation_grid (plus courts chemins évitant les obstacles)")
+        # Conversion unique de la grille, partagée par tous les parcours
+        grid = np.asarray(navigation_grid, dtype=np.uint8)
+        height, width = grid.shape
+        rows = height - coords[:, 1]
+        cols = coords[:, 0] - 1
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        rows = np.where(inside, rows, 0)
+        cols = np.where(inside, cols, 0)
     else:
         print(f"  ⚠️  Pas de navigation_grid → utilisation Manhattan simple")
     
+    # Un seul parcours BFS par position source (partagé par les produits
+    # situés sur la même case) donne la distance vers toutes les cibles
+    fields = {}
+    
     for i, from_key in enumerate(all_points):
-        for to_key in all_points:
-            from_pos = locations[from_key]
-            to_pos = locations[to_key]
-            
-            if use_astar:
-                # Utiliser A* avec obstacles
-                dist = astar_distance(from_pos, to_pos, navigation_grid)
-            else:
-                # Fallback sur Manhattan
-                dist = manhattan_distance(from_pos, to_pos)
+        # Distance Manhattan : valeur directe sans grille, repli sinon
+        row_dist = matrix[i]
+        
+        if use_astar:
+            from_pos = tuple(locations[from_key])
+            field = fields.get(from_pos)
+            if field is None:
+                field = fields[from_pos] = bfs_distance_field(from_pos, grid)
             
-            distances[(from_key, to_key)] = dist
+            # -1 = cible hors grille, bloquée ou inatteignable → Manhattan
+            bfs_dist = np.where(inside, field[rows, cols], -1)
+            row_dist = np.where(bfs_dist >= 0, bfs_dist, row_dist)
+        
+        matrix[i] = row_dist
+        distances.update(zip([(from_key, to_key) for to_key in all_points],
+                             row_dist.tolist()))
     
     return {
         'entry': entry_point,
         'locations': locations,
         'distances': distances,
+        'matrix': matrix,
+        'index': {key: i for i, key in enumerate(all_points)},
         'grid': navigation_grid
     }
 
@@ -78,7 +107,7 @@ if __name__ == "__main__":
     print(f"Point d'entrée : {distance_data['entry']}")
     print(f"Nombre de locations : {len(distance_data['locations'])}")
     print(f"Nombre de distances calculées : {len(distance_data['distances'])}")
-    print(f"Grille navigation : {'✓ Activée' if distance_data['grid'] else '❌ Désactivée'}")
+    print(f"Grille navigation : {'✓ Activée' if distance_data['grid'] is not None else '❌ Désactivée'}")
     
     # Exemples de distances
     print("\n=== EXEMPLES DE DISTANCES ===")
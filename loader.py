@@ -1,24 +1,104 @@
 import json
+import os
+import pickle
+import numpy as np
 
-def load_warehouse(filepath):
-    """Charge les données de l'entrepôt"""
+# orjson (optionnel) : décodage JSON plus rapide, repli sur json sinon
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
+# Cache disque des fichiers JSON décodés : .cache/<fichier>.pkl à côté du
+# fichier source, invalidé quand sa date de modification ou sa taille change
+CACHE_DIR = '.cache'
+
+def _parse_json(filepath):
+    """Décode un fichier JSON (orjson si disponible)"""
+    if _json_fast is not None:
+        with open(filepath, 'rb') as f:
+            return _json_fast.loads(f.read())
     with open(filepath, 'r') as f:
         return json.load(f)
 
+def cached_load(filepath, load_fn):
+    """
+    Charge filepath avec load_fn en réutilisant le résultat picklé du
+    précédent appel si le fichier n'a pas changé depuis
+    
+    Args:
+        filepath: chemin du fichier source
+        load_fn: fonction filepath → objet (picklable)
+    
+    Returns:
+        L'objet chargé (cache ou load_fn)
+    """
+    stat = os.stat(filepath)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cache_dir = os.path.join(os.path.dirname(filepath), CACHE_DIR)
+    cache_path = os.path.join(cache_dir, os.path.basename(filepath) + '.pkl')
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, obj = pickle.load(f)
+        if cached_key == key:
+            return obj
+    except Exception:
+        pass  # Pas de cache, illisible ou périmé (module/classe renommé...) : rechargement
+    
+    obj = load_fn(filepath)
+    
+    # Écriture atomique ; un cache impossible à écrire n'empêche pas le chargement
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((key, obj), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return obj
+
+def _load_json(filepath):
+    """Lit un fichier JSON, via le cache disque si le fichier n'a pas changé"""
+    return cached_load(filepath, _parse_json)
+
+def load_warehouse(filepath):
+    """Charge les données de l'entrepôt (navigation_grid en ndarray uint8, coords des zones en ndarray int16 (N, 2))"""
+    warehouse = _load_json(filepath)
+    # Coordonnées des zones en tableaux : écriture directe dans la grille de rendu
+    for zone in warehouse.get('zones', {}).values():
+        zone['coords'] = np.asarray(zone['coords'], dtype=np.int16).reshape(-1, 2)
+    # Grille convertie une seule fois, partagée par A*, BFS et trajectoires
+    if warehouse.get('navigation_grid') is not None:
+        grid = np.ascontiguousarray(warehouse['navigation_grid'], dtype=np.uint8)
+        # Lecture seule : les tables de saut (calculées au premier A*, cf.
+        # astar.jump_tables) restent valides
+        grid.flags.writeable = False
+        warehouse['navigation_grid'] = grid
+    return warehouse
+
 def load_products(filepath):
-    """Charge les données des produits"""
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    """Charge les données des produits (pickup_location en ndarray int16)"""
+    products = _load_json(filepath)
+    # Toutes les positions dans un seul tableau (N, 2) : chaque produit
+    # référence sa ligne (vue, sans copie)
+    locations_arr = np.array([p['pickup_location'] for p in products], dtype=np.int16)
+    for product, location in zip(products, locations_arr):
+        product['pickup_location'] = location
+    return products
 
 def load_agents(filepath):
     """Charge les données des agents"""
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    return _load_json(filepath)
 
 def load_orders(filepath):
     """Charge les données des commandes"""
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    return _load_json(filepath)
+
+def load_zones_access(filepath):
+    """Charge les règles d'accès aux zones"""
+    return _load_json(filepath)
 
 if __name__ == "__main__":
     # Charger les données
@@ -44,7 +124,7 @@ if __name__ == "__main__":
     print("\n=== EXEMPLES PRODUITS ===")
     for i in range(5):
         p = products[i]
-        print(f"{p['id']}: {p['name']} - {p['category']} - {p['weight']}kg - Location: {p['location']} - pickup_location: {p['pickup_location']}")
+        print(f"{p['id']}: {p['name']} - {p['category']} - {p['weight']}kg - Location: {p['location']} - pickup_location: {p['pickup_location'].tolist()}")
     
     # Quelques commandes
     print("\n=== EXEMPLES COMMANDES ===")
@@ -3,9 +3,84 @@ OPTIPICK - Optimisation de Tournées d'Entrepôt
 Workflow principal avec VOYAGES MULTIPLES
 """
 
-import json
+import heapq
+import sys
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
 
-def main():
+# Coûts horaires par type d'agent
+COST_RATES = {
+    'robot': 5,    # 5€/h
+    'human': 25,   # 25€/h
+    'cart': 3      # 3€/h
+}
+
+# Nombre de voyages détaillés par agent dans le rapport
+MAX_TRIPS_SHOWN = 3
+
+def _silent(*args, **kwargs):
+    """Remplace print quand verbose=False"""
+
+def trip_number(product):
+    """Numéro de voyage d'un produit de tournée (1 si absent)"""
+    return product.get('trip_number', 1)
+
+def compute_total_cost(agent_summary, human_cart_assignments=None):
+    """
+    Coût global des tournées : durée × coût horaire de chaque agent, plus
+    le coût de l'humain qui guide chaque chariot utilisé
+    
+    Args:
+        agent_summary: liste des résumés par agent (id, type, products,
+            last_visit, start_time)
+        human_cart_assignments: dict {cart_id: human_id} (optionnel)
+    
+    Returns:
+        float: coût total en €
+    """
+    # Agents avec produits, puis chariots guidés (coût humain)
+    working = [summary for summary in agent_summary if summary['products']]
+    rates = [COST_RATES[summary['type']] for summary in working]
+    working_by_id = {summary['id']: summary for summary in working}
+    for cart_id in (human_cart_assignments or {}):
+        if cart_id in working_by_id:
+            working.append(working_by_id[cart_id])
+            rates.append(COST_RATES['human'])
+    
+    # Noyau compilé importé ici : numba n'est chargé qu'au calcul du coût
+    from cost_kernels import total_cost
+    
+    return total_cost(
+        [summary['last_visit'] for summary in working],
+        [summary['start_time'] for summary in working],
+        rates
+    )
+
+def prompt_num_orders(max_orders):
+    """
+    Demande le nombre de commandes à traiter jusqu'à obtenir une valeur valide
+    
+    Args:
+        max_orders: nombre de commandes disponibles
+    
+    Returns:
+        int entre 1 et max_orders
+    """
+    print("\n>>> NOMBRE DE COMMANDES À TRAITER <<<")
+    while True:
+        choix_nb = input(f"Combien de commandes traiter ? (1-{max_orders}) : ").strip()
+        if not (choix_nb.isascii() and choix_nb.isdigit()):
+            print("❌ Entrez un nombre valide")
+            continue
+        
+        num_orders = int(choix_nb)
+        if 1 <= num_orders <= max_orders:
+            print(f"✓ {num_orders} commandes sélectionnées\n")
+            return num_orders
+        print(f"❌ Entrez un nombre entre 1 et {max_orders}")
+
+def main(num_orders=None, verbose=True):
     """
     Workflow principal OPTIPICK avec voyages multiples
     
@@ -14,69 +89,68 @@ def main():
     3. Optimiser les tournées (OR-Tools avec voyages multiples)
     4. Vérifier et ajuster les collisions
     5. Afficher résultats finaux
+    
+    Args:
+        num_orders: nombre de commandes à traiter (None → demandé à l'utilisateur)
+        verbose: False pour ne rien afficher (appel depuis un autre programme)
+    
+    Returns:
+        dict avec solution, collisions, entrepôt, agents et résumé global
+        (None si l'optimisation échoue)
     """
+    log = print if verbose else _silent
     
-    print("="*80)
-    print("                    OPTIPICK WORKFLOW - OPTIMISATION TEMPS")
-    print("="*80)
+    log("="*80)
+    log("                    OPTIPICK WORKFLOW - OPTIMISATION TEMPS")
+    log("="*80)
     
-    # Importer les modules nécessaires
-    from optimizer_mintime import optimize_routes, minutes_to_time, time_to_minutes
-    from loader import load_warehouse, load_products, load_agents, load_orders
-    from distances import calculate_distance_matrix
-    from collision_checker import check_and_adjust_collisions
+    # Importer les modules nécessaires (les modules de calcul, dont OR-Tools,
+    # ne sont importés qu'à leur première étape, après la saisie utilisateur)
+    from loader import load_warehouse, load_products, load_agents, load_orders, load_zones_access
     
     # === ÉTAPE 1 : CHARGEMENT DES DONNÉES ===
-    print("\n[1/5] Chargement des données...")
+    log("\n[1/5] Chargement des données...")
     
     warehouse = load_warehouse('warehouse.json')
     products = load_products('products.json')
     agents = load_agents('agents.json')
     orders = load_orders('orders.json')
     
-    with open('zones_access.json', 'r') as f:
-        zones_access = json.load(f)
+    zones_access = load_zones_access('zones_access.json')
     
-    print(f"  ✓ Entrepôt : {warehouse['dimensions']['width']}x{warehouse['dimensions']['height']}")
-    print(f"  ✓ Produits : {len(products)}")
-    print(f"  ✓ Agents : {len(agents)}")
-    print(f"  ✓ Commandes disponibles : {len(orders)}")
+    log(f"  ✓ Entrepôt : {warehouse['dimensions']['width']}x{warehouse['dimensions']['height']}")
+    log(f"  ✓ Produits : {len(products)}")
+    log(f"  ✓ Agents : {len(agents)}")
+    log(f"  ✓ Commandes disponibles : {len(orders)}")
     
     # === CHOIX DU NOMBRE DE COMMANDES ===
-    print("\n>>> NOMBRE DE COMMANDES À TRAITER <<<")
-    while True:
-        try:
-            choix_nb = input(f"Combien de commandes traiter ? (1-{len(orders)}) : ").strip()
-            num_orders = int(choix_nb)
-            
-            if 1 <= num_orders <= len(orders):
-                print(f"✓ {num_orders} commandes sélectionnées\n")
-                break
-            else:
-                print(f"❌ Entrez un nombre entre 1 et {len(orders)}")
-        except ValueError:
-            print("❌ Entrez un nombre valide")
+    if num_orders is None:
+        num_orders = prompt_num_orders(len(orders))
+    elif not 1 <= num_orders <= len(orders):
+        raise ValueError(f"num_orders doit être entre 1 et {len(orders)}")
     
     # === ÉTAPE 2 : CALCUL DES DISTANCES ===
-    print("\n[2/5] Calcul de la matrice des distances...")
+    log("\n[2/5] Calcul de la matrice des distances...")
+    from distances import calculate_distance_matrix
     
     # Charger la grille de navigation
     navigation_grid = warehouse.get('navigation_grid', None)
     
-    if navigation_grid:
-        print(f"  🗺️  Grille de navigation chargée ({len(navigation_grid)}x{len(navigation_grid[0])})")
+    if navigation_grid is not None:
+        log(f"  🗺️  Grille de navigation chargée ({navigation_grid.shape[0]}x{navigation_grid.shape[1]})")
     else:
-        print(f"  ⚠️  Pas de grille de navigation → distances approximatives")
+        log(f"  ⚠️  Pas de grille de navigation → distances approximatives")
     
     distance_data = calculate_distance_matrix(products, warehouse['entry_point'], navigation_grid)
-    print(f"  ✓ {len(distance_data['distances'])} distances calculées")
+    log(f"  ✓ {len(distance_data['distances'])} distances calculées")
     
     # === ÉTAPE 3 : OPTIMISATION OR-TOOLS ===
-    print(f"\n[3/5] Optimisation des tournées - Stratégie : MINIMISER LE TEMPS...")
+    log(f"\n[3/5] Optimisation des tournées - Stratégie : MINIMISER LE TEMPS...")
+    from optimizer_mintime import optimize_routes_partitioned, minutes_to_time, time_to_minutes, HHMM_TABLE
     
     selected_orders = orders[:num_orders]
     
-    solution = optimize_routes(
+    solution = optimize_routes_partitioned(
         selected_orders, 
         products, 
         agents, 
@@ -86,13 +160,14 @@ def main():
     )
     
     if solution['status'] != 'success':
-        print("  ❌ Échec de l'optimisation")
+        log("  ❌ Échec de l'optimisation")
         return
     
-    print(f"  ✓ Tournées optimisées pour {len(solution['agents_routes'])} agents")
+    log(f"  ✓ Tournées optimisées pour {len(solution['agents_routes'])} agents")
     
     # === ÉTAPE 4 : VÉRIFICATION ET RÉSOLUTION DES COLLISIONS ===
-    print("\n[4/5] Vérification et résolution des collisions...")
+    log("\n[4/5] Vérification et résolution des collisions...")
+    from collision_checker import check_and_adjust_collisions, trajectory_minutes
     
     collision_result = check_and_adjust_collisions(
         solution,
@@ -104,144 +179,88 @@ def main():
     )
     
     # === ÉTAPE 5 : RÉSULTATS FINAUX ===
-    print("\n" + "="*80)
-    print(f"                RÉSULTATS FINAUX - OPTIMISATION TEMPS")
-    print("="*80)
-    
-    # Afficher les assignations humain→chariot
-    if solution.get('human_cart_assignments'):
-        print("\n>>> ASSIGNATIONS HUMAIN→CHARIOT <<<")
-        for cart_id, human_id in solution['human_cart_assignments'].items():
-            print(f"  {cart_id} guidé par {human_id}")
+    agents_dict = {a['id']: a for a in agents}
     
-    # Afficher les tournées avec délais et voyages
-    print("\n>>> TOURNÉES AVEC VOYAGES MULTIPLES <<<")
+    # === AGRÉGATION PAR AGENT (une seule passe sur les tournées) ===
+    # Délai, voyages et fin de tournée de chaque agent, réutilisés
+    # par tous les affichages et résumés qui suivent
+    delays = collision_result['delays']
+    trajectories = collision_result['trajectories']
     
-    agents_dict = {a['id']: a for a in agents}
+    agent_summary = []
+    total_products = 0
+    total_voyages = 0
     
     for agent_id, route_data in solution['agents_routes'].items():
         agent = agents_dict[agent_id]
+        agent_type = agent['type']
         products_list = route_data['products']
-        delay = collision_result['delays'].get(agent_id, 0)
+        delay = delays.get(agent_id, 0)
         
-        # Calculer temps total de trajet
-        trajectory = collision_result['trajectories'].get(agent_id, {})
-        temps_trajet_min = len(trajectory)
-        temps_trajet_str = f"{temps_trajet_min} min"
-        if temps_trajet_min >= 60:
-            heures = temps_trajet_min // 60
-            minutes = temps_trajet_min % 60
-            temps_trajet_str = f"{heures}h{minutes:02d}"
+        # Seuls les 3 premiers voyages sont affichés (aucun si verbose=False) :
+        # on compte tous les voyages mais on ne groupe que les produits de ces 3 là
+        trip_numbers = {trip_number(p) for p in products_list}
+        shown_trips = set(heapq.nsmallest(MAX_TRIPS_SHOWN, trip_numbers)) if verbose else set()
         
-        # Grouper par voyage
-        trips = {}
-        for p in products_list:
-            trip = p.get('trip_number', 1)
-            if trip not in trips:
-                trips[trip] = []
-            trips[trip].append(p)
+        # Grouper par voyage (tri stable : l'ordre des produits est conservé)
+        by_trip = sorted((p for p in products_list if trip_number(p) in shown_trips), key=trip_number)
+        trips = {
+            trip: list(trip_products)
+            for trip, trip_products in groupby(by_trip, key=trip_number)
+        }
         
-        print(f"\n{agent_id} ({agent['type']}) - Délai départ: +{delay} min | Temps trajet: {temps_trajet_str}")
-        print(f"  Poids total: {route_data['total_weight']:.1f} kg / {agent['capacity_weight']} kg")
-        print(f"  Volume total: {route_data['total_volume']} dm³ / {agent['capacity_volume']} dm³")
-        print(f"  Produits : {len(products_list)} | Voyages : {len(trips)}")
-        
-        # Afficher chaque voyage (limiter à 3 voyages max pour pas surcharger l'affichage)
-        for trip_num in sorted(trips.keys())[:3]:
-            trip_products = trips[trip_num]
-            trip_weight = sum(p['product_data']['weight'] for p in trip_products)
-            trip_volume = sum(p['product_data']['volume'] for p in trip_products)
-            print(f"\n    🚚 Voyage {trip_num} : {len(trip_products)} produits | {trip_weight:.1f}kg | {trip_volume}dm³")
-            
-            # Afficher produits du voyage (max 5 premiers)
-            for idx, p in enumerate(trip_products[:5]):
-                visit_mins = p['visit_time'] + delay
-                visit_time_str = minutes_to_time(visit_mins)
-                deadline_str = p['deadline']
-                priority = p['priority']
-                priority_icon = "⚡" if priority == "express" else "📦"
-                
-                deadline_mins = time_to_minutes(deadline_str)
-                status = "✓" if visit_mins <= deadline_mins else "❌ RETARD"
-                
-                print(f"      {priority_icon} {p['product_id']} - {visit_time_str} | Deadline: {deadline_str} {status}")
-            
-            if len(trip_products) > 5:
-                print(f"      ... et {len(trip_products) - 5} autres produits")
-        
-        if len(trips) > 3:
-            print(f"\n    ... et {len(trips) - 3} autres voyages")
-    
-    # ANALYSE DISTRIBUTION DES CHARGES
-    print("\n>>> ANALYSE DISTRIBUTION <<<")
-    agent_stats = []
-    
-    for agent_id, route_data in solution['agents_routes'].items():
-        products_list = route_data['products']
-        delay = collision_result['delays'].get(agent_id, 0)
-        
-        # Compter le nombre de voyages
-        trips = {}
-        for p in products_list:
-            trip = p.get('trip_number', 1)
-            trips[trip] = trips.get(trip, 0) + 1
+        summary = {
+            'id': agent_id,
+            'agent': agent,
+            'type': agent_type,
+            'route': route_data,
+            'products': products_list,
+            'delay': delay,
+            'trips': trips,
+            'by_trip': by_trip,
+            'nb_trips': len(trip_numbers)
+        }
+        total_products += len(products_list)
+        total_voyages += len(trip_numbers)
         
         if products_list:
+            # Temps de travail = fin - début (en minutes)
             last_visit = products_list[-1]['visit_time'] + delay
             start_time = delay
-            duree_travail = last_visit - start_time
-            
-            agent_stats.append({
-                'id': agent_id,
-                'nb_produits': len(products_list),
-                'nb_voyages': len(trips),
-                'debut': minutes_to_time(start_time),
-                'fin': minutes_to_time(last_visit),
-                'duree': duree_travail
-            })
-    
-    # Trier par durée décroissante
-    agent_stats.sort(key=lambda x: x['duree'], reverse=True)
-    
-    print(f"\n  {'Agent':<6} | {'Produits':<9} | {'Voyages':<8} | {'Début':<8} | {'Fin':<8} | {'Durée':<10}")
-    print(f"  {'-'*6}-+-{'-'*9}-+-{'-'*8}-+-{'-'*8}-+-{'-'*8}-+-{'-'*10}")
-    
-    for stat in agent_stats:
-        duree_str = f"{stat['duree']} min"
-        if stat['duree'] >= 60:
-            h = stat['duree'] // 60
-            m = stat['duree'] % 60
-            duree_str = f"{h}h{m:02d}"
+            summary['last_visit'] = last_visit
+            summary['start_time'] = start_time
+            summary['duree'] = last_visit - start_time
         
-        print(f"  {stat['id']:<6} | {stat['nb_produits']:<9} | {stat['nb_voyages']:<8} | {stat['debut']:<8} | {stat['fin']:<8} | {duree_str:<10}")
-    
-    # Agent le plus lent (goulot d'étranglement)
-    if agent_stats:
-        bottleneck = agent_stats[0]
-        print(f"\n  ⚠️  GOULOT D'ÉTRANGLEMENT : {bottleneck['id']} avec {bottleneck['nb_produits']} produits en {bottleneck['nb_voyages']} voyages")
-        print(f"      → Termine à {bottleneck['fin']} (durée: {bottleneck['duree']} min)")
-    
-    # Résumé collisions
-    print("\n>>> RÉSUMÉ COLLISIONS <<<")
-    print(f"  Collisions résolues : {len(collision_result['collisions'])} collisions restantes")
-    if len(collision_result['collisions']) > 0:
-        print("  ⚠️  Quelques collisions subsistent, augmenter max_iterations")
-    else:
-        print("  ✅ Toutes les collisions résolues !")
+        agent_summary.append(summary)
     
-    # Résumé global
-    total_products = sum(len(r['products']) for r in solution['agents_routes'].values())
-    total_temps_trajet = sum(len(traj) for traj in collision_result['trajectories'].values())
-    total_voyages = sum(len(set(p.get('trip_number', 1) for p in r['products'])) for r in solution['agents_routes'].values())
+    # Temps global : quand le dernier agent termine
+    max_end_time = max((summary['last_visit'] for summary in agent_summary if summary['products']), default=0)
     
-    # Calculer le temps global (quand le dernier agent termine)
-    max_end_time = 0
-    for agent_id, route_data in solution['agents_routes'].items():
-        products_list = route_data['products']
-        delay = collision_result['delays'].get(agent_id, 0)
-        if products_list:
-            last_visit = products_list[-1]['visit_time'] + delay
-            max_end_time = max(max_end_time, last_visit)
+    # Coût global (agents + humains qui guident les chariots)
+    total_cost = compute_total_cost(agent_summary, solution.get('human_cart_assignments'))
+    
+    # ANALYSE DISTRIBUTION DES CHARGES
+    agent_stats = [
+        {
+            'id': summary['id'],
+            'nb_produits': len(summary['products']),
+            'nb_voyages': summary['nb_trips'],
+            'debut': minutes_to_time(summary['start_time']),
+            'fin': minutes_to_time(summary['last_visit']),
+            'duree': summary['duree']
+        }
+        for summary in agent_summary if summary['products']
+    ]
+    
+    if verbose:
+        # Trier par durée décroissante (tableau affiché) ; le premier est le plus lent
+        agent_stats.sort(key=itemgetter('duree'), reverse=True)
+        bottleneck = agent_stats[0] if agent_stats else None
+    else:
+        # Seul le goulot d'étranglement sert : pas besoin de trier
+        bottleneck = max(agent_stats, key=itemgetter('duree'), default=None)
+    
+    total_temps_trajet = sum(map(trajectory_minutes, trajectories.values()))
     
     temps_global_str = f"{max_end_time} min"
     if max_end_time >= 60:
@@ -249,72 +268,147 @@ def main():
         minutes = max_end_time % 60
         temps_global_str = f"{heures}h{minutes:02d}"
     
-    # Calculer le coût global
-    # Coûts horaires par type d'agent
-    COST_RATES = {
-        'robot': 5,    # 5€/h
-        'human': 25,   # 25€/h
-        'cart': 3      # 3€/h
-    }
-    
-    total_cost = 0.0
-    for agent_id, route_data in solution['agents_routes'].items():
-        agent = agents_dict[agent_id]
-        products_list = route_data['products']
-        delay = collision_result['delays'].get(agent_id, 0)
+    if verbose:
+        # Rapport accumulé ligne par ligne puis écrit en une fois
+        report_lines = []
+        report = report_lines.append
         
-        if products_list:
-            # Temps de travail = fin - début (en minutes)
-            last_visit = products_list[-1]['visit_time'] + delay
-            start_time = delay
-            duree_min = last_visit - start_time
+        report("\n" + "="*80)
+        report(f"                RÉSULTATS FINAUX - OPTIMISATION TEMPS")
+        report("="*80)
+        
+        # Afficher les assignations humain→chariot
+        if solution.get('human_cart_assignments'):
+            report("\n>>> ASSIGNATIONS HUMAIN→CHARIOT <<<")
+            for cart_id, human_id in solution['human_cart_assignments'].items():
+                report(f"  {cart_id} guidé par {human_id}")
+        
+        # Deadlines converties une seule fois (beaucoup de produits partagent la même)
+        deadline_cache = {
+            d: time_to_minutes(d)
+            for d in {p['deadline'] for r in solution['agents_routes'].values() for p in r['products']}
+        }
+        
+        # Afficher les tournées avec délais et voyages
+        report("\n>>> TOURNÉES AVEC VOYAGES MULTIPLES <<<")
+        
+        for summary in agent_summary:
+            agent_id = summary['id']
+            agent = summary['agent']
+            agent_type = summary['type']
+            route_data = summary['route']
+            products_list = summary['products']
+            delay = summary['delay']
+            trips = summary['trips']
+            nb_trips = summary['nb_trips']
+            
+            # Calculer temps total de trajet
+            trajectory = trajectories.get(agent_id)
+            temps_trajet_min = trajectory_minutes(trajectory) if trajectory is not None else 0
+            temps_trajet_str = f"{temps_trajet_min} min"
+            if temps_trajet_min >= 60:
+                heures = temps_trajet_min // 60
+                minutes = temps_trajet_min % 60
+                temps_trajet_str = f"{heures}h{minutes:02d}"
+            
+            report(f"\n{agent_id} ({agent_type}) - Délai départ: +{delay} min | Temps trajet: {temps_trajet_str}")
+            report(f"  Poids total: {route_data['total_weight']:.1f} kg / {agent['capacity_weight']} kg")
+            report(f"  Volume total: {route_data['total_volume']} dm³ / {agent['capacity_volume']} dm³")
+            report(f"  Produits : {len(products_list)} | Voyages : {nb_trips}")
             
-            # Convertir en heures
-            duree_heures = duree_min / 60.0
+            # Poids et volume des voyages affichés : une réduction numpy par
+            # tournée sur les produits triés par voyage (un segment par voyage)
+            by_trip = summary['by_trip']
+            if by_trip:
+                trip_starts = np.cumsum([0] + [len(t) for t in trips.values()][:-1])
+                weights = np.fromiter((p['product_data']['weight'] for p in by_trip), dtype=float, count=len(by_trip))
+                volumes = np.array([p['product_data']['volume'] for p in by_trip])  # entiers si possible
+                trip_weights = dict(zip(trips, np.add.reduceat(weights, trip_starts).tolist()))
+                trip_volumes = dict(zip(trips, np.add.reduceat(volumes, trip_starts).tolist()))
             
-            # Coût = durée × coût horaire
-            agent_cost = duree_heures * COST_RATES[agent['type']]
-            total_cost += agent_cost
-    
-    # Ajouter le coût des humains qui guident les chariots
-    if solution.get('human_cart_assignments'):
-        for cart_id, human_id in solution['human_cart_assignments'].items():
-            # Si le chariot est utilisé, ajouter le coût de l'humain qui le guide
-            if cart_id in solution['agents_routes']:
-                cart_route = solution['agents_routes'][cart_id]
-                products_list = cart_route['products']
-                delay = collision_result['delays'].get(cart_id, 0)
+            # Afficher chaque voyage (limiter à 3 voyages max pour pas surcharger l'affichage)
+            for trip_num in sorted(trips.keys()):
+                trip_products = trips[trip_num]
+                trip_weight = trip_weights[trip_num]
+                trip_volume = trip_volumes[trip_num]
+                report(f"\n    🚚 Voyage {trip_num} : {len(trip_products)} produits | {trip_weight:.1f}kg | {trip_volume}dm³")
                 
-                if products_list:
-                    last_visit = products_list[-1]['visit_time'] + delay
-                    start_time = delay
-                    duree_min = last_visit - start_time
-                    duree_heures = duree_min / 60.0
+                # Afficher produits du voyage (max 5 premiers)
+                for idx, p in enumerate(trip_products[:5]):
+                    visit_mins = p['visit_time'] + delay
+                    visit_time_str = HHMM_TABLE[visit_mins] if 0 <= visit_mins < len(HHMM_TABLE) else minutes_to_time(visit_mins)
+                    deadline_str = p['deadline']
+                    priority = p['priority']
+                    priority_icon = "⚡" if priority == "express" else "📦"
                     
-                    # Coût humain
-                    human_cost = duree_heures * COST_RATES['human']
-                    total_cost += human_cost
-    
-    print(f"\n>>> RÉSUMÉ GLOBAL <<<")
-    print(f"  Stratégie : MINIMISER LE TEMPS")
-    print(f"  Commandes traitées : {num_orders}")
-    print(f"  Produits ramassés : {total_products}")
-    print(f"  Agents utilisés : {len(solution['agents_routes'])}")
-    print(f"  Voyages totaux : {total_voyages}")
-    print(f"  Temps global (début → fin) : {temps_global_str}")
-    print(f"  Temps total de trajet : {total_temps_trajet} min (cumulé tous agents)")
-    print(f"  Délais appliqués : {sum(collision_result['delays'].values())} min au total")
-    print(f"  💰 Coût total : {total_cost:.2f}€")
-    
-    print("\n" + "="*80)
-    print("                      WORKFLOW TERMINÉ")
-    print("="*80)
+                    deadline_mins = deadline_cache[deadline_str]
+                    status = "✓" if visit_mins <= deadline_mins else "❌ RETARD"
+                    
+                    report(f"      {priority_icon} {p['product_id']} - {visit_time_str} | Deadline: {deadline_str} {status}")
+                
+                if len(trip_products) > 5:
+                    report(f"      ... et {len(trip_products) - 5} autres produits")
+            
+            if nb_trips > MAX_TRIPS_SHOWN:
+                report(f"\n    ... et {nb_trips - MAX_TRIPS_SHOWN} autres voyages")
+        
+        # ANALYSE DISTRIBUTION DES CHARGES
+        report("\n>>> ANALYSE DISTRIBUTION <<<")
+        report(f"\n  {'Agent':<6} | {'Produits':<9} | {'Voyages':<8} | {'Début':<8} | {'Fin':<8} | {'Durée':<10}")
+        report(f"  {'-'*6}-+-{'-'*9}-+-{'-'*8}-+-{'-'*8}-+-{'-'*8}-+-{'-'*10}")
+        
+        for stat in agent_stats:
+            duree_str = f"{stat['duree']} min"
+            if stat['duree'] >= 60:
+                h = stat['duree'] // 60
+                m = stat['duree'] % 60
+                duree_str = f"{h}h{m:02d}"
+            
+            report(f"  {stat['id']:<6} | {stat['nb_produits']:<9} | {stat['nb_voyages']:<8} | {stat['debut']:<8} | {stat['fin']:<8} | {duree_str:<10}")
+        
+        # Agent le plus lent (goulot d'étranglement)
+        if bottleneck is not None:
+            report(f"\n  ⚠️  GOULOT D'ÉTRANGLEMENT : {bottleneck['id']} avec {bottleneck['nb_produits']} produits en {bottleneck['nb_voyages']} voyages")
+            report(f"      → Termine à {bottleneck['fin']} (durée: {bottleneck['duree']} min)")
+        
+        # Résumé collisions
+        report("\n>>> RÉSUMÉ COLLISIONS <<<")
+        report(f"  Collisions résolues : {len(collision_result['collisions'])} collisions restantes")
+        if len(collision_result['collisions']) > 0:
+            report("  ⚠️  Quelques collisions subsistent, augmenter max_iterations")
+        else:
+            report("  ✅ Toutes les collisions résolues !")
+        
+        # Résumé global
+        report(f"\n>>> RÉSUMÉ GLOBAL <<<")
+        report(f"  Stratégie : MINIMISER LE TEMPS")
+        report(f"  Commandes traitées : {num_orders}")
+        report(f"  Produits ramassés : {total_products}")
+        report(f"  Agents utilisés : {len(solution['agents_routes'])}")
+        report(f"  Voyages totaux : {total_voyages}")
+        report(f"  Temps global (début → fin) : {temps_global_str}")
+        report(f"  Temps total de trajet : {total_temps_trajet} min (cumulé tous agents)")
+        report(f"  Délais appliqués : {sum(delays.values())} min au total")
+        report(f"  💰 Coût total : {total_cost:.2f}€")
+        
+        report("\n" + "="*80)
+        report("                      WORKFLOW TERMINÉ")
+        report("="*80)
+        
+        sys.stdout.write("\n".join(report_lines) + "\n")
     
     return {
         'solution': solution,
         'collision_result': collision_result,
         'warehouse': warehouse,
-        'agents': agents
+        'agents': agents,
+        'agent_stats': agent_stats,
+        'bottleneck': bottleneck,
+        'total_products': total_products,
+        'total_voyages': total_voyages,
+        'temps_global_min': max_end_time,
+        'temps_global_str': temps_global_str,
+        'total_cost': total_cost
     }
 
 if __name__ == "__main__":
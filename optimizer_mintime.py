@@ -1,27 +1,53 @@
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from numba import njit
 from ortools.sat.python import cp_model
 from loader import load_warehouse, load_products, load_agents, load_orders
 from distances import calculate_distance_matrix
 
+# Variable d'environnement : paramètres CP-SAT supplémentaires (format texte)
+SOLVER_PARAMS_ENV = 'OPTIPICK_CPSAT_PARAMS'
+
+# Threads CP-SAT par sous-problème quand les commandes sont résolues en parallèle
+PARTITION_WORKERS = 2
+
+# Taille minimale d'un groupe de commandes pour le résoudre dans un processus dédié
+PARTITION_MIN_PARALLEL_ORDERS = 5
+
 def time_to_minutes(time_str):
     """Convertit heure 'HH:MM' en minutes depuis 9h00"""
     hours, minutes = map(int, time_str.split(':'))
     total_minutes = hours * 60 + minutes
     return total_minutes - (9 * 60)
 
+def _format_minutes(minutes):
+    """Formate minutes depuis 9h00 en heure 'HH:MM'"""
+    hours, mins = divmod(minutes + (9 * 60), 60)
+    return f"{hours:02d}:{mins:02d}"
+
+# Heures 'HH:MM' précalculées pour 0 à 24h de minutes depuis 9h00
+HHMM_TABLE = [_format_minutes(t) for t in range(24 * 60 + 1)]
+
 def minutes_to_time(minutes):
     """Convertit minutes depuis 9h00 en heure 'HH:MM'"""
-    total_minutes = minutes + (9 * 60)
-    hours = total_minutes // 60
-    mins = total_minutes % 60
-    return f"{hours:02d}:{mins:02d}"
+    if 0 <= minutes < len(HHMM_TABLE):
+        return HHMM_TABLE[minutes]
+    return _format_minutes(minutes)
+
+def robot_zone_set(zones_access):
+    """Emplacements accessibles aux robots, en ensemble de tuples (test d'appartenance O(1))"""
+    return frozenset(tuple(z) for z in zones_access['robot_accessible_storage'])
 
-def can_agent_handle_product(agent, product, zones_access):
+def can_agent_handle_product(agent, product, zones_access, robot_zones=None):
     """Vérifie si un agent peut gérer un produit selon les contraintes"""
     if agent['type'] == 'robot':
+        if robot_zones is None:
+            robot_zones = robot_zone_set(zones_access)
         restrictions = agent.get('restrictions', {})
-        product_location = product['location']
-        if product_location not in zones_access['robot_accessible_storage']:
+        if tuple(product['location']) not in robot_zones:
             return False
         if product['category'] == 'food':
             return False
@@ -32,10 +58,207 @@ def can_agent_handle_product(agent, product, zones_access):
             return False
     return True
 
-def optimize_routes(available_orders, products, agents, distance_data, zones_access, entry_point, current_time="08:00"):
+def product_eligible_agents(product, agents, zones_access, robot_zones=None):
+    """
+    Indices des agents pouvant prendre le produit : restrictions de l'agent,
+    produit seul dans la capacité d'un voyage, robots seuls pour la zone robot
+    (si au moins un robot peut le prendre)
+    """
+    if robot_zones is None:
+        robot_zones = robot_zone_set(zones_access)
+    candidates = [
+        a for a, agent in enumerate(agents)
+        if can_agent_handle_product(agent, product, zones_access, robot_zones)
+        and int(product['weight'] * 1000) <= int(agent['capacity_weight'] * 1000)
+        and int(product['volume']) <= agent['capacity_volume']
+    ]
+    if tuple(product['location']) in robot_zones:
+        robots = [a for a in candidates if agents[a]['type'] == 'robot']
+        candidates = robots or candidates
+    return candidates
+
+def partition_orders(orders, products, agents, zones_access):
+    """
+    Regroupe les commandes en parties indépendantes : deux parties n'ont aucun
+    agent éligible en commun (chariots et humains qui les guident liés)
+    
+    Args:
+        orders: Liste des commandes
+        products: Liste des produits
+        agents: Liste des agents
+        zones_access: Zones accessibles
+    
+    Returns:
+        Liste de listes de commandes, ordre d'origine conservé dans chaque partie
+    """
+    product_dict = {p['id']: p for p in products}
+    robot_zones = robot_zone_set(zones_access)
+    parent = list(range(len(agents)))
+    
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+    
+    def union(a, b):
+        parent[find(a)] = find(b)
+    
+    # Un chariot utilisé mobilise un humain : chariots et humains dans la même partie
+    guided = [a for a, agent in enumerate(agents) if agent['type'] in ('cart', 'human')]
+    if any(agents[a]['type'] == 'cart' for a in guided):
+        for a in guided[1:]:
+            union(guided[0], a)
+    
+    order_agents = []
+    for order in orders:
+        eligible = set()
+        for item in order['items']:
+            eligible.update(product_eligible_agents(product_dict[item['product_id']], agents, zones_access, robot_zones))
+        order_agents.append(eligible)
+        eligible = sorted(eligible)
+        for a in eligible[1:]:
+            union(eligible[0], a)
+    
+    # Commandes sans agent éligible : rattachées à la première partie
+    groups = {}
+    for order, eligible in zip(orders, order_agents):
+        root = find(min(eligible)) if eligible else None
+        groups.setdefault(root, []).append(order)
+    if None in groups and len(groups) > 1:
+        orphans = groups.pop(None)
+        first = next(iter(groups))
+        groups[first] = [o for o in orders if o in groups[first] or o in orphans]
+    return list(groups.values())
+
+@njit(cache=True)
+def _greedy_kernel(order, eligible, weights_g, volumes, capacity_g, capacity_volume,
+                   incompatible, travel, prep, max_trips, picking_time, depot_time):
+    """
+    Noyau du plan glouton sur tableaux (cf. greedy_plan)
+    
+    Returns:
+        (agent, voyage, temps de visite) par produit ; agent -1 si aucun agent éligible
+    """
+    num_products = len(order)
+    num_agents = eligible.shape[1]
+    agent_of = np.full(num_products, -1, dtype=np.int64)
+    trip_of = np.zeros(num_products, dtype=np.int64)
+    visit_of = np.zeros(num_products, dtype=np.int64)
+    
+    load = np.zeros(num_agents, dtype=np.int64)
+    current_trip = np.ones(num_agents, dtype=np.int64)
+    trip_weight = np.zeros(num_agents, dtype=np.int64)  # Contenu du voyage courant
+    trip_volume = np.zeros(num_agents, dtype=np.int64)
+    
+    for i in order:
+        # Agent éligible le moins chargé (plus petit indice à égalité)
+        a = -1
+        for b in range(num_agents):
+            if eligible[i, b] and (a < 0 or load[b] < load[a]):
+                a = b
+        if a < 0:
+            return agent_of, trip_of, visit_of
+        
+        # Nouveau voyage si capacité dépassée ou produit incompatible
+        incompatible_in_trip = False
+        for k in range(num_products):
+            if agent_of[k] == a and trip_of[k] == current_trip[a] and incompatible[i, k]:
+                incompatible_in_trip = True
+                break
+        weight = trip_weight[a] + weights_g[i]
+        volume = trip_volume[a] + volumes[i]
+        if load[a] > 0 and current_trip[a] < max_trips and (
+                weight > capacity_g[a] or volume > capacity_volume[a] or incompatible_in_trip):
+            current_trip[a] += 1
+            weight = weights_g[i]
+            volume = volumes[i]
+        trip_weight[a] = weight
+        trip_volume[a] = volume
+        trip = current_trip[a]
+        
+        # Respecter l'écart minimal avec chaque produit déjà visité par l'agent
+        visit = 0
+        for k in range(num_products):
+            if agent_of[k] == a:
+                if trip_of[k] == trip:
+                    gap = travel[a, k, i]
+                else:
+                    gap = prep[a, k] + depot_time + prep[a, i]
+                visit = max(visit, visit_of[k] + gap + picking_time)
+        
+        agent_of[i] = a
+        trip_of[i] = trip
+        visit_of[i] = visit
+        load[a] += 1
+    
+    return agent_of, trip_of, visit_of
+
+def greedy_plan(products_to_pick, agents, eligible_agents, travel_times, prep_times, max_trips, picking_time, depot_time):
+    """
+    Construit un plan glouton servant d'amorce (hint) au solveur
+    
+    Produits triés express d'abord puis par deadline, chacun confié à l'agent éligible
+    le moins chargé ; le voyage courant est rempli jusqu'à la capacité ou une incompatibilité.
+    
+    Args:
+        products_to_pick: Liste des produits à ramasser
+        agents: Liste des agents
+        eligible_agents: Pour chaque produit, indices des agents pouvant le prendre
+        travel_times: Par agent, matrice des temps de trajet produit → produit (même voyage)
+        prep_times: Par agent, vecteur des temps produit ↔ préparation
+        max_trips: Nombre maximum de voyages par agent
+        picking_time: Temps de picking en minutes
+        depot_time: Temps de dépôt à la préparation en minutes
+    
+    Returns:
+        Liste de (agent, voyage, temps de visite) par produit, ou None si un produit n'a aucun agent
+    """
+    num_products = len(products_to_pick)
+    order = sorted(range(num_products), key=lambda i: (
+        products_to_pick[i]['priority'] != 'express',
+        time_to_minutes(products_to_pick[i]['deadline']),
+        i
+    ))
+    
+    eligible = np.zeros((num_products, len(agents)), dtype=np.bool_)
+    for i, candidates in enumerate(eligible_agents):
+        eligible[i, candidates] = True
+    
+    product_data = [p['product_data'] for p in products_to_pick]
+    weights_g = np.array([int(p['weight'] * 1000) for p in product_data], dtype=np.int64)
+    volumes = np.array([int(p['volume']) for p in product_data], dtype=np.int64)
+    capacity_g = np.array([int(agent['capacity_weight'] * 1000) for agent in agents], dtype=np.int64)
+    capacity_volume = np.array([agent['capacity_volume'] for agent in agents], dtype=np.float64)
+    
+    # Incompatibilités dans les deux sens, calculées sur les ids distincts
+    unique_ids = list(dict.fromkeys(p['id'] for p in product_data))
+    id_index = {prod_id: k for k, prod_id in enumerate(unique_ids)}
+    unique_incompatible = np.zeros((len(unique_ids), len(unique_ids)), dtype=np.bool_)
+    for p in product_data:
+        for other_id in p.get('incompatible_with', []):
+            if other_id in id_index:
+                unique_incompatible[id_index[p['id']], id_index[other_id]] = True
+    unique_incompatible |= unique_incompatible.T
+    prod_idx = np.array([id_index[p['id']] for p in product_data], dtype=np.intp)
+    incompatible = unique_incompatible[np.ix_(prod_idx, prod_idx)]
+    
+    travel = np.array(travel_times, dtype=np.int64).reshape(len(agents), num_products, num_products)
+    prep = np.array(prep_times, dtype=np.int64).reshape(len(agents), num_products)
+    
+    agent_of, trip_of, visit_of = _greedy_kernel(
+        np.array(order, dtype=np.int64), eligible, weights_g, volumes, capacity_g, capacity_volume,
+        incompatible, travel, prep, max_trips, picking_time, depot_time
+    )
+    if (agent_of < 0).any():
+        return None
+    return list(zip(agent_of.tolist(), trip_of.tolist(), visit_of.tolist()))
+
+def optimize_routes(available_orders, products, agents, distance_data, zones_access, entry_point, current_time="08:00", num_workers=None):
     """
     Optimise les tournées AVEC VOYAGES MULTIPLES
     Les agents peuvent retourner à la zone de préparation [6,5] pour déposer et repartir
+    num_workers (optionnel) remplace le nombre de threads CP-SAT choisi selon la taille
     """
     
     model = cp_model.CpModel()
@@ -43,27 +266,38 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
     # Point de préparation où les agents déposent les produits
     PREPARATION_POINT = [6, 5]  # Zone verte de préparation
     
+    # Zones robot converties une seule fois pour les tests d'appartenance
+    robot_zones = robot_zone_set(zones_access)
+    
     # === DONNÉES ===
-    products_to_pick = []
     product_dict = {p['id']: p for p in products}
     
-    for order in available_orders:
-        for item in order['items']:
-            prod_id = item['product_id']
-            quantity = item['quantity']
-            for _ in range(quantity):
-                products_to_pick.append({
-                    'product_id': prod_id,
-                    'order_id': order['id'],
-                    'product_data': product_dict[prod_id],
-                    'deadline': order['deadline'],
-                    'priority': order['priority']
-                })
+    # Une entrée par unité commandée, product_data partagé (non copié)
+    products_to_pick = [
+        {
+            'product_id': item['product_id'],
+            'order_id': order['id'],
+            'product_data': product_dict[item['product_id']],
+            'deadline': order['deadline'],
+            'priority': order['priority']
+        }
+        for order in available_orders
+        for item in order['items']
+        for _ in range(item['quantity'])
+    ]
     
     num_products = len(products_to_pick)
     num_agents = len(agents)
     MAX_TRIPS = 15  # Maximum de voyages par agent
     
+    # Tableaux parallèles (un indice par produit) pour les accès répétés
+    product_data = [p['product_data'] for p in products_to_pick]
+    weights_g = np.array([int(p['weight'] * 1000) for p in product_data], dtype=np.int64)
+    volumes = np.array([int(p['volume']) for p in product_data], dtype=np.int64)
+    prod_loc = np.array([p['pickup_location'] for p in product_data], dtype=np.int64).reshape(num_products, 2)
+    deadline_minutes = [time_to_minutes(p['deadline']) for p in products_to_pick]
+    priority = [p['priority'] for p in products_to_pick]
+    
     print(f"\n=== OPTIMISATION MULTI-VOYAGES ===")
     print(f"Produits à ramasser : {num_products}")
     print(f"Agents disponibles : {num_agents}")
@@ -74,11 +308,24 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
     TIME_START = 0
     TIME_END = 480
     
-    # 1. Assignation produit → agent
+    # Agents éligibles par produit (robots seuls pour la zone robot, cf. C1b),
+    # dont un voyage peut contenir le produit seul (cf. C2/C3)
+    robot_indices = [a for a, agent in enumerate(agents) if agent['type'] == 'robot']
+    eligible_by_id = {}
+    eligible_agents = []
+    for item in products_to_pick:
+        prod_id = item['product_id']
+        if prod_id not in eligible_by_id:
+            eligible_by_id[prod_id] = product_eligible_agents(item['product_data'], agents, zones_access, robot_zones)
+        eligible_agents.append(eligible_by_id[prod_id])
+    
+    # 1. Assignation produit → agent : variable seulement pour les agents éligibles
+    # (les autres paires n'ont ni nœud de tournée, ni voyage, ni créneau de capacité)
     assignment = {}
     for i in range(num_products):
+        eligible = set(eligible_agents[i])
         for a in range(num_agents):
-            if can_agent_handle_product(agents[a], products_to_pick[i]['product_data'], zones_access):
+            if a in eligible:
                 assignment[(i, a)] = model.NewBoolVar(f'assign_p{i}_a{a}')
             else:
                 assignment[(i, a)] = 0
@@ -90,77 +337,111 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
             if (i, a) in assignment and not isinstance(assignment[(i, a)], int):
                 trip_number[(i, a)] = model.NewIntVar(1, MAX_TRIPS, f'trip_p{i}_a{a}')
     
-    # 3. Temps de visite
+    # 3. Temps de visite, domaine borné par la deadline (C5)
     visit_time = {}
     for i in range(num_products):
-        visit_time[i] = model.NewIntVar(TIME_START, TIME_END, f'visit_time_p{i}')
+        latest = max(TIME_START, min(deadline_minutes[i], TIME_END))
+        visit_time[i] = model.NewIntVar(TIME_START, latest, f'visit_time_p{i}')
     
-    # 4. Ordre de visite entre produits
-    before = {}
-    for a in range(num_agents):
-        for i in range(num_products):
-            for j in range(num_products):
-                if i != j:
-                    before[(i, j, a)] = model.NewBoolVar(f'before_p{i}_p{j}_a{a}')
-    
-    # C1b : Cohérence temporelle - Temps de trajet + picking
+    # C1b : Tournée de chaque agent - circuit préparation → produits → préparation
+    # Arc direct i → j : même voyage, temps trajet + picking
+    # Arc via préparation i → [6,5] → j : voyage suivant, temps retour + picking
     PICKING_TIME = 1  # minutes
     METERS_PER_CELL = 3  # 1 case = 5 mètres
+    DEPOT_TIME = 2  # minutes pour déposer
+    
+    # Distances en cases entre produits, indexées par position dans products_to_pick
+    if 'matrix' in distance_data:
+        point_index = distance_data['index']
+        prod_idx = np.array([point_index[p['product_id']] for p in products_to_pick], dtype=np.intp)
+        distance_cases_matrix = distance_data['matrix'][np.ix_(prod_idx, prod_idx)].astype(np.float64)
+    else:
+        # Dictionnaire seul : matrice dense sur les ids distincts, 0 si paire absente
+        unique_ids = list(dict.fromkeys(p['product_id'] for p in products_to_pick))
+        id_index = {prod_id: k for k, prod_id in enumerate(unique_ids)}
+        pair_distances = distance_data['distances']
+        unique_dist = np.array([[pair_distances.get((u, v), 0) for v in unique_ids] for u in unique_ids],
+                               dtype=np.float64).reshape(len(unique_ids), len(unique_ids))
+        prod_idx = np.array([id_index[p['product_id']] for p in products_to_pick], dtype=np.intp)
+        distance_cases_matrix = unique_dist[np.ix_(prod_idx, prod_idx)]
+    
+    # Distance Manhattan produit → [6,5] (symétrique : aller et retour identiques)
+    dist_to_prep = np.abs(prod_loc - np.array(PREPARATION_POINT)).sum(axis=1)
+    
+    # Bornes de visite par produit pour écarter les arcs impossibles
+    # (premier produit d'une tournée visitable dès TIME_START : pas de trajet d'entrée)
+    earliest_visit = [TIME_START] * num_products
+    
+    # Littéraux des arcs, par agent : départ, fin, direct, via préparation
+    idle = {}
+    start_arc = {}
+    end_arc = {}
+    direct_arc = {}
+    via_arc = {}
+    travel_times = []
+    prep_times = []
     
     for a in range(num_agents):
         agent = agents[a]
         agent_speed_m_per_min = agent['speed'] * 60
         
-        for i in range(num_products):
-            for j in range(num_products):
-                if i != j and (i, a) in assignment and (j, a) in assignment:
-                    var_i = assignment[(i, a)]
-                    var_j = assignment[(j, a)]
-                    
-                    if not isinstance(var_i, int) and not isinstance(var_j, int):
-                        # Si les deux produits assignés au même agent
-                        both_assigned = model.NewBoolVar(f'both_p{i}_p{j}_a{a}')
-                        model.Add(var_i + var_j == 2).OnlyEnforceIf(both_assigned)
-                        model.Add(var_i + var_j < 2).OnlyEnforceIf(both_assigned.Not())
-                        
-                        # Si même agent, définir ordre
-                        model.Add(before[(i, j, a)] + before[(j, i, a)] == 1).OnlyEnforceIf(both_assigned)
-                        
-                        # Si i avant j, calculer temps
-                        prod_i_id = products_to_pick[i]['product_id']
-                        prod_j_id = products_to_pick[j]['product_id']
-                        
-                        distance_cases = distance_data['distances'].get((prod_i_id, prod_j_id), 0)
-                        distance_meters = distance_cases * METERS_PER_CELL
-                        travel_time = int(distance_meters / agent_speed_m_per_min) + 1
-                        
-                        # Si même voyage, ajouter temps trajet + picking
-                        same_trip = model.NewBoolVar(f'same_trip_p{i}_p{j}_a{a}')
-                        if (i, a) in trip_number and (j, a) in trip_number:
-                            model.Add(trip_number[(i, a)] == trip_number[(j, a)]).OnlyEnforceIf([both_assigned, same_trip])
-                            model.Add(trip_number[(i, a)] != trip_number[(j, a)]).OnlyEnforceIf([both_assigned, same_trip.Not()])
-                            
-                            # Si même voyage ET i avant j
-                            model.Add(visit_time[j] >= visit_time[i] + travel_time + PICKING_TIME).OnlyEnforceIf([before[(i, j, a)], same_trip])
-                            
-                            # Si voyages différents ET i avant j : retour à préparation [6,5]
-                            # Temps = distance(i → préparation) + 2 min dépôt + distance(préparation → j)
-                            prod_i_loc = products_to_pick[i]['product_data']['pickup_location']
-                            prod_j_loc = products_to_pick[j]['product_data']['pickup_location']
-                            
-                            # Distance Manhattan produit i → [6,5]
-                            dist_to_prep = abs(prod_i_loc[0] - PREPARATION_POINT[0]) + abs(prod_i_loc[1] - PREPARATION_POINT[1])
-                            time_to_prep = int((dist_to_prep * METERS_PER_CELL) / agent_speed_m_per_min) + 1
-                            
-                            # Distance Manhattan [6,5] → produit j
-                            dist_from_prep = abs(PREPARATION_POINT[0] - prod_j_loc[0]) + abs(PREPARATION_POINT[1] - prod_j_loc[1])
-                            time_from_prep = int((dist_from_prep * METERS_PER_CELL) / agent_speed_m_per_min) + 1
-                            
-                            # Temps total retour = aller + dépôt + retour
-                            DEPOT_TIME = 2  # minutes pour déposer
-                            return_time = time_to_prep + DEPOT_TIME + time_from_prep
-                            
-                            model.Add(visit_time[j] >= visit_time[i] + return_time + PICKING_TIME).OnlyEnforceIf([before[(i, j, a)], same_trip.Not()])
+        # Temps précalculés pour toutes les paires (i, j) de cet agent
+        travel_time_matrix = ((distance_cases_matrix * METERS_PER_CELL) / agent_speed_m_per_min).astype(np.int64) + 1
+        time_to_prep = (((dist_to_prep * METERS_PER_CELL) / agent_speed_m_per_min).astype(np.int64) + 1).tolist()
+        travel_times.append(travel_time_matrix)
+        travel_time_matrix = travel_time_matrix.tolist()
+        prep_times.append(time_to_prep)
+        
+        # Nœud 0 = préparation, puis un nœud par produit dont l'agent est éligible
+        agent_products = [i for i in range(num_products) if a in eligible_agents[i]]
+        node = {i: k + 1 for k, i in enumerate(agent_products)}
+        
+        # Agent inutilisé : la préparation boucle sur elle-même
+        idle[a] = model.NewBoolVar(f'idle_a{a}')
+        arcs = [(0, 0, idle[a])]
+        
+        for i in agent_products:
+            # Produit non pris par l'agent : nœud sauté
+            arcs.append((node[i], node[i], assignment[(i, a)].Not()))
+            model.AddImplication(assignment[(i, a)], idle[a].Not())
+            
+            # Premier produit de la tournée : voyage 1
+            start_arc[(i, a)] = model.NewBoolVar(f'start_p{i}_a{a}')
+            arcs.append((0, node[i], start_arc[(i, a)]))
+            model.Add(trip_number[(i, a)] == 1).OnlyEnforceIf(start_arc[(i, a)])
+            
+            end_arc[(i, a)] = model.NewBoolVar(f'end_p{i}_a{a}')
+            arcs.append((node[i], 0, end_arc[(i, a)]))
+        
+        for i in agent_products:
+            travel_row = travel_time_matrix[i]
+            # Temps retour = aller (i → préparation) + dépôt, sans le retour préparation → j
+            leave_i = time_to_prep[i] + DEPOT_TIME
+            for j in agent_products:
+                if i == j:
+                    continue
+                
+                # C5b : pas d'arc standard → express, les express passent en premier
+                if priority[i] == 'standard' and priority[j] == 'express':
+                    continue
+                
+                # Arcs écartés quand la deadline de j est inatteignable
+                travel_time = travel_row[j] + PICKING_TIME
+                if earliest_visit[i] + travel_time <= deadline_minutes[j]:
+                    direct = direct_arc[(i, j, a)] = model.NewBoolVar(f'direct_p{i}_p{j}_a{a}')
+                    arcs.append((node[i], node[j], direct))
+                    model.Add(visit_time[j] >= visit_time[i] + travel_time).OnlyEnforceIf(direct)
+                    model.Add(trip_number[(j, a)] == trip_number[(i, a)]).OnlyEnforceIf(direct)
+                
+                # Temps = distance(i → préparation) + 2 min dépôt + distance(préparation → j)
+                return_time = leave_i + time_to_prep[j] + PICKING_TIME
+                if earliest_visit[i] + return_time <= deadline_minutes[j]:
+                    via = via_arc[(i, j, a)] = model.NewBoolVar(f'via_prep_p{i}_p{j}_a{a}')
+                    arcs.append((node[i], node[j], via))
+                    model.Add(visit_time[j] >= visit_time[i] + return_time).OnlyEnforceIf(via)
+                    model.Add(trip_number[(j, a)] == trip_number[(i, a)] + 1).OnlyEnforceIf(via)
+        
+        model.AddCircuit(arcs)
     
     # === CONTRAINTES ===
     
@@ -172,13 +453,11 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
     
     # C1b : FORCER l'utilisation des robots pour produits zone robot
     # Si un produit est en zone robot, il DOIT être assigné à un robot
-    robot_indices = [a for a, agent in enumerate(agents) if agent['type'] == 'robot']
-    
     for i in range(num_products):
-        product_location = products_to_pick[i]['product_data']['location']
+        product_location = tuple(products_to_pick[i]['product_data']['location'])
         
         # Si produit en zone robot
-        if product_location in zones_access['robot_accessible_storage']:
+        if product_location in robot_zones:
             # Ce produit DOIT être pris par un robot
             robot_assignments = [
                 assignment[(i, a)] 
@@ -190,47 +469,23 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
                 # Au moins un robot doit le prendre (en fait exactement 1 grâce à C1)
                 model.Add(sum(robot_assignments) == 1)
     
-    # C2 : Capacité POIDS par voyage
-    for a in range(num_agents):
-        agent = agents[a]
-        for trip in range(1, MAX_TRIPS + 1):
-            # Poids total des produits du voyage 'trip' pour agent 'a'
-            trip_weight = []
-            for i in range(num_products):
-                if (i, a) in assignment and not isinstance(assignment[(i, a)], int):
-                    # Indicateur : ce produit est dans ce voyage ?
-                    in_this_trip = model.NewBoolVar(f'p{i}_a{a}_trip{trip}')
-                    
-                    # in_this_trip = 1 si (produit assigné à 'a' ET trip_number == trip)
-                    model.Add(trip_number[(i, a)] == trip).OnlyEnforceIf([assignment[(i, a)], in_this_trip])
-                    model.Add(trip_number[(i, a)] != trip).OnlyEnforceIf([assignment[(i, a)], in_this_trip.Not()])
-                    model.Add(in_this_trip == 0).OnlyEnforceIf(assignment[(i, a)].Not())
-                    
-                    weight_g = int(products_to_pick[i]['product_data']['weight'] * 1000)
-                    trip_weight.append(weight_g * in_this_trip)
-            
-            if trip_weight:
-                capacity_g = int(agent['capacity_weight'] * 1000)
-                model.Add(sum(trip_weight) <= capacity_g)
-    
-    # C3 : Capacité VOLUME par voyage
+    # C2/C3 : Capacités POIDS et VOLUME par voyage
+    # Chaque produit assigné occupe la case [trip_number, trip_number + 1) de l'axe des voyages :
+    # un cumulatif par agent borne la somme des demandes sur chaque voyage
     for a in range(num_agents):
         agent = agents[a]
-        for trip in range(1, MAX_TRIPS + 1):
-            trip_volume = []
-            for i in range(num_products):
-                if (i, a) in assignment and not isinstance(assignment[(i, a)], int):
-                    in_this_trip = model.NewBoolVar(f'p{i}_a{a}_trip{trip}_vol')
-                    
-                    model.Add(trip_number[(i, a)] == trip).OnlyEnforceIf([assignment[(i, a)], in_this_trip])
-                    model.Add(trip_number[(i, a)] != trip).OnlyEnforceIf([assignment[(i, a)], in_this_trip.Not()])
-                    model.Add(in_this_trip == 0).OnlyEnforceIf(assignment[(i, a)].Not())
-                    
-                    volume = int(products_to_pick[i]['product_data']['volume'])
-                    trip_volume.append(volume * in_this_trip)
-            
-            if trip_volume:
-                model.Add(sum(trip_volume) <= agent['capacity_volume'])
+        handled = [i for i in range(num_products)
+                   if (i, a) in assignment and not isinstance(assignment[(i, a)], int)]
+        trip_intervals = [
+            model.NewOptionalFixedSizeIntervalVar(
+                trip_number[(i, a)], 1, assignment[(i, a)], f'trip_slot_p{i}_a{a}')
+            for i in handled
+        ]
+        
+        if trip_intervals:
+            capacity_g = int(agent['capacity_weight'] * 1000)
+            model.AddCumulative(trip_intervals, weights_g[handled].tolist(), capacity_g)
+            model.AddCumulative(trip_intervals, volumes[handled].tolist(), int(agent['capacity_volume']))
     
     # C4 : Incompatibilités produits (même voyage seulement)
     for i in range(num_products):
@@ -241,60 +496,21 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
             incompatible_ids = prod_i.get('incompatible_with', [])
             if prod_j['id'] in incompatible_ids:
                 for a in range(num_agents):
-                    if (i, a) in assignment and (j, a) in assignment:
-                        var_i = assignment[(i, a)]
-                        var_j = assignment[(j, a)]
-                        if not isinstance(var_i, int) and not isinstance(var_j, int):
-                            # Si même agent ET même voyage → interdit
-                            both_same = model.NewBoolVar(f'incomp_p{i}_p{j}_a{a}')
-                            model.Add(var_i + var_j == 2).OnlyEnforceIf(both_same)
-                            model.Add(var_i + var_j < 2).OnlyEnforceIf(both_same.Not())
-                            
-                            same_trip = model.NewBoolVar(f'same_trip_p{i}_p{j}_a{a}')
-                            model.Add(trip_number[(i, a)] == trip_number[(j, a)]).OnlyEnforceIf([both_same, same_trip])
-                            model.Add(trip_number[(i, a)] != trip_number[(j, a)]).OnlyEnforceIf([both_same, same_trip.Not()])
-                            
-                            # Interdit d'être dans le même voyage
-                            model.Add(same_trip == 0).OnlyEnforceIf(both_same)
+                    if a in eligible_agents[i] and a in eligible_agents[j]:
+                        # Si même agent → voyages différents
+                        model.Add(trip_number[(i, a)] != trip_number[(j, a)]).OnlyEnforceIf(
+                            [assignment[(i, a)], assignment[(j, a)]])
     
     # C5 : Deadlines
-    for i, product_item in enumerate(products_to_pick):
-        deadline_minutes = time_to_minutes(product_item['deadline'])
-        model.Add(visit_time[i] <= deadline_minutes)
+    for i in range(num_products):
+        model.Add(visit_time[i] <= deadline_minutes[i])
     
     # C5b : Priority - Express avant Standard
-    # Si un agent a des produits express ET standard, les express doivent être visités en premier
-    for a in range(num_agents):
-        for i in range(num_products):
-            for j in range(num_products):
-                if i != j:
-                    prod_i = products_to_pick[i]
-                    prod_j = products_to_pick[j]
-                    
-                    # Si i = express et j = standard, et assignés au même agent
-                    if prod_i['priority'] == 'express' and prod_j['priority'] == 'standard':
-                        if (i, a) in assignment and (j, a) in assignment:
-                            var_i = assignment[(i, a)]
-                            var_j = assignment[(j, a)]
-                            
-                            if not isinstance(var_i, int) and not isinstance(var_j, int):
-                                # Si les deux sont assignés à l'agent a, alors i doit être visité avant j
-                                both_assigned = model.NewBoolVar(f'both_express_std_p{i}_p{j}_a{a}')
-                                model.Add(var_i + var_j == 2).OnlyEnforceIf(both_assigned)
-                                model.Add(var_i + var_j < 2).OnlyEnforceIf(both_assigned.Not())
-                                
-                                # Si les deux assignés, express avant standard
-                                model.Add(visit_time[i] < visit_time[j]).OnlyEnforceIf(both_assigned)
+    # Assurée par les tournées (C1b) : aucun arc d'un produit standard vers un express
     
     # C6 : Agents utilisés + Chariots nécessitent humains
-    agents_used = []
-    for a in range(num_agents):
-        agent_used = model.NewBoolVar(f'agent_{a}_used')
-        products_assigned = [assignment[(i, a)] for i in range(num_products) if (i, a) in assignment and not isinstance(assignment[(i, a)], int)]
-        if products_assigned:
-            model.Add(sum(products_assigned) >= 1).OnlyEnforceIf(agent_used)
-            model.Add(sum(products_assigned) == 0).OnlyEnforceIf(agent_used.Not())
-        agents_used.append(agent_used)
+    # Agent utilisé ⇔ préparation non bouclée sur elle-même (déjà canalisé par C1b)
+    agents_used = [idle[a].Not() for a in range(num_agents)]
     
     cart_indices = [i for i, agent in enumerate(agents) if agent['type'] == 'cart']
     human_indices = [i for i, agent in enumerate(agents) if agent['type'] == 'human']
@@ -314,57 +530,117 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
         carts_assigned = [human_to_cart[(h_idx, c_idx)] for c_idx in cart_indices]
         model.Add(sum(carts_assigned) <= 1)
     
+    # C7 : Symétrie entre agents identiques (mêmes caractéristiques hors id)
+    # Deux agents interchangeables : le premier porte au moins autant de produits que le suivant
+    identical_groups = {}
+    for a, agent in enumerate(agents):
+        profile = json.dumps({k: v for k, v in agent.items() if k != 'id'}, sort_keys=True)
+        identical_groups.setdefault(profile, []).append(a)
+    
+    for group in identical_groups.values():
+        for a1, a2 in zip(group, group[1:]):
+            load_a1 = [assignment[(i, a1)] for i in range(num_products) if not isinstance(assignment[(i, a1)], int)]
+            load_a2 = [assignment[(i, a2)] for i in range(num_products) if not isinstance(assignment[(i, a2)], int)]
+            if load_a1 or load_a2:
+                model.Add(sum(load_a1) >= sum(load_a2))
+    
     # === OBJECTIF : MINIMISER LE TEMPS GLOBAL ===
     # Temps max = quand le dernier agent termine
     
-    max_end_time = model.NewIntVar(TIME_START, TIME_END, 'max_end_time')
+    # Aucune visite après la dernière deadline
+    latest_end = max(TIME_START, min(max(deadline_minutes, default=TIME_END), TIME_END))
+    max_end_time = model.NewIntVar(TIME_START, latest_end, 'max_end_time')
+    
+    # Chaque produit étant pris par exactement un agent (C1), le dernier
+    # agent termine à la plus grande date de visite
+    for i in range(num_products):
+        model.Add(max_end_time >= visit_time[i])
     
-    # Pour chaque agent, trouver son temps de fin
+    # Borne impliquée : deux visites successives d'un agent sont espacées d'au moins
+    # 1 min de trajet + picking, ses k produits finissent au plus tôt à (k - 1) × écart
+    MIN_GAP = 1 + PICKING_TIME
     for a in range(num_agents):
-        # Temps du dernier produit assigné à cet agent
-        agent_last_time = model.NewIntVar(TIME_START, TIME_END, f'last_time_a{a}')
-        
-        # Trouver le max des visit_time pour cet agent
-        products_times = []
-        for i in range(num_products):
-            if (i, a) in assignment and not isinstance(assignment[(i, a)], int):
-                # Si produit assigné à cet agent
-                time_contrib = model.NewIntVar(TIME_START, TIME_END, f'time_contrib_p{i}_a{a}')
-                model.Add(time_contrib == visit_time[i]).OnlyEnforceIf(assignment[(i, a)])
-                model.Add(time_contrib == TIME_START).OnlyEnforceIf(assignment[(i, a)].Not())
-                products_times.append(time_contrib)
-        
-        if products_times:
-            model.AddMaxEquality(agent_last_time, products_times)
-        else:
-            model.Add(agent_last_time == TIME_START)
-        
-        # max_end_time doit être >= au temps de fin de chaque agent
-        model.Add(max_end_time >= agent_last_time)
+        agent_load = [assignment[(i, a)] for i in range(num_products) if a in eligible_agents[i]]
+        if len(agent_load) > 1:
+            model.Add(max_end_time >= MIN_GAP * (sum(agent_load) - 1))
     
     # OBJECTIF : Minimiser le temps global
     model.Minimize(max_end_time)
     
+    # === AMORCE GLOUTONNE ===
+    plan = greedy_plan(products_to_pick, agents, eligible_agents, travel_times, prep_times,
+                       MAX_TRIPS, PICKING_TIME, DEPOT_TIME)
+    if plan is not None:
+        for i, (chosen, trip, visit) in enumerate(plan):
+            for a in range(num_agents):
+                if not isinstance(assignment[(i, a)], int):
+                    model.AddHint(assignment[(i, a)], a == chosen)
+            model.AddHint(trip_number[(i, chosen)], trip)
+            model.AddHint(visit_time[i], min(visit, TIME_END))
+        
+        # Arcs des tournées : produits de chaque agent dans l'ordre des visites
+        chosen_arcs = set()
+        for a in range(num_agents):
+            route = sorted((visit, i) for i, (chosen, _, visit) in enumerate(plan) if chosen == a)
+            if route:
+                chosen_arcs.add(('start', route[0][1], a))
+                chosen_arcs.add(('end', route[-1][1], a))
+            for (_, i), (_, j) in zip(route, route[1:]):
+                chosen_arcs.add(('direct' if plan[i][1] == plan[j][1] else 'via', i, j, a))
+            model.AddHint(idle[a], not route)
+        
+        for (i, a), literal in start_arc.items():
+            model.AddHint(literal, ('start', i, a) in chosen_arcs)
+        for (i, a), literal in end_arc.items():
+            model.AddHint(literal, ('end', i, a) in chosen_arcs)
+        for (i, j, a), literal in direct_arc.items():
+            model.AddHint(literal, ('direct', i, j, a) in chosen_arcs)
+        for (i, j, a), literal in via_arc.items():
+            model.AddHint(literal, ('via', i, j, a) in chosen_arcs)
+        
+        # Chaque chariot utilisé reçoit un humain distinct
+        used_agents = {chosen for chosen, _, _ in plan}
+        free_humans = iter(human_indices)
+        for c_idx in cart_indices:
+            h_idx = next(free_humans, None) if c_idx in used_agents else None
+            for h in human_indices:
+                model.AddHint(human_to_cart[(h, c_idx)], h == h_idx)
+    
     # === RÉSOLUTION ===
     solver = cp_model.CpSolver()
     
     # PARAMÈTRES POUR RÉSULTATS COHÉRENTS ET OPTIMAUX
     solver.parameters.random_seed = 12345  # Résultats reproductibles
-    solver.parameters.num_search_workers = 9  # Parallélisme (plus de threads)
     
-    # Temps de résolution adapté au nombre de commandes
+    # Temps de résolution et recherche adaptés au nombre de commandes
     num_orders = len(available_orders)
     
     if num_orders <= 20:
         solver.parameters.max_time_in_seconds = 45.0  # 45 sec
+        solver.parameters.num_search_workers = 4  # Petit modèle : peu de threads suffisent
+        solver.parameters.linearization_level = 1
         print(f"  ⏱️  Temps de résolution : 45 sec (1-20 commandes)")
     elif num_orders <= 50:
         solver.parameters.max_time_in_seconds = 120.0  # 2 min
+        solver.parameters.num_search_workers = 8
+        solver.parameters.linearization_level = 1  # Valeur par défaut de CP-SAT
         print(f"  ⏱️  Temps de résolution : 2 min (21-50 commandes)")
     else:  # 51-100 commandes
         solver.parameters.max_time_in_seconds = 300.0  # 5 min
+        solver.parameters.num_search_workers = 12
+        solver.parameters.linearization_level = 2
         print(f"  ⏱️  Temps de résolution : 5 min (51+ commandes)")
     
+    if num_workers:
+        solver.parameters.num_search_workers = num_workers
+    
+    # Réglage manuel : paramètres CP-SAT au format texte, prioritaires
+    # ex. OPTIPICK_CPSAT_PARAMS="num_search_workers: 16 log_search_progress: true"
+    extra_params = os.environ.get(SOLVER_PARAMS_ENV)
+    if extra_params:
+        solver.parameters.merge_text_format(extra_params)
+        print(f"  ⚙️  Paramètres CP-SAT : {extra_params}")
+    
     status = solver.Solve(model)
     
     # === RÉSULTATS ===
@@ -412,6 +688,71 @@ def optimize_routes(available_orders, products, agents, distance_data, zones_acc
         print(f"Status: {status}")
         return {'status': 'no_solution'}
 
+def optimize_routes_partitioned(available_orders, products, agents, distance_data, zones_access, entry_point, current_time="08:00",
+                                parallel=True, min_parallel_orders=PARTITION_MIN_PARALLEL_ORDERS):
+    """
+    Comme optimize_routes, en résolvant séparément chaque partie indépendante des
+    commandes (cf. partition_orders), puis en fusionnant les tournées
+    
+    Les parties n'ayant aucun agent en commun, le temps global optimal est le
+    maximum des optima de chaque partie : le découpage ne dégrade pas la solution.
+    Les tournées fusionnées suivent l'ordre de la liste agents, comme optimize_routes
+    (l'attribution des cases de dépôt en dépend).
+    
+    Args:
+        parallel: résoudre les grandes parties dans des processus séparés (spawn) ;
+            False pour les hôtes qui ne supportent pas spawn (ex. streamlit run)
+        min_parallel_orders: taille minimale d'une partie pour un processus dédié
+            (en dessous, le démarrage du processus coûte plus que la résolution)
+    """
+    groups = partition_orders(available_orders, products, agents, zones_access)
+    if len(groups) <= 1:
+        return optimize_routes(available_orders, products, agents, distance_data, zones_access, entry_point, current_time)
+    
+    # Parties assez grandes pour un processus dédié (au moins deux, sinon tout sur place)
+    pooled = [k for k, group in enumerate(groups) if parallel and len(group) >= min_parallel_orders]
+    if len(pooled) < 2:
+        pooled = []
+    print(f"\n🧩 {len(groups)} groupes de commandes indépendants ({len(pooled)} résolus en parallèle)")
+    
+    results = [None] * len(groups)
+    pool = None
+    if pooled:
+        # spawn : OR-Tools ne supporte pas un fork après initialisation
+        pool = ProcessPoolExecutor(max_workers=min(len(pooled), os.cpu_count() or 1),
+                                   mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = {
+            k: pool.submit(optimize_routes, groups[k], products, agents, distance_data, zones_access,
+                           entry_point, current_time, PARTITION_WORKERS)
+            for k in pooled
+        }
+        # Petites parties résolues sur place, pendant que les processus travaillent
+        for k, group in enumerate(groups):
+            if k not in futures:
+                results[k] = optimize_routes(group, products, agents, distance_data, zones_access, entry_point,
+                                             current_time, PARTITION_WORKERS if futures else None)
+        for k, future in futures.items():
+            results[k] = future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    if any(r['status'] != 'success' for r in results):
+        return {'status': 'no_solution'}
+    
+    # Fusion dans l'ordre des agents (et non des parties)
+    agents_routes = {}
+    human_cart_assignments = {}
+    for r in results:
+        agents_routes.update(r['agents_routes'])
+        human_cart_assignments.update(r['human_cart_assignments'])
+    return {
+        'status': 'success',
+        'agents_routes': {a['id']: agents_routes[a['id']] for a in agents if a['id'] in agents_routes},
+        'human_cart_assignments': {a['id']: human_cart_assignments[a['id']] for a in agents if a['id'] in human_cart_assignments}
+    }
+
 if __name__ == "__main__":
     warehouse = load_warehouse('warehouse.json')
     products = load_products('products.json')
@@ -3,49 +3,78 @@ Module pour lancer l'optimisation OPTIPICK depuis Streamlit
 Retourne les résultats structurés pour affichage
 """
 
-import json
-from loader import load_warehouse, load_products, load_agents, load_orders
+import functools
+import os
+from loader import load_warehouse, load_products, load_agents, load_orders, load_zones_access
 from distances import calculate_distance_matrix
-from optimizer_mintime import optimize_routes, minutes_to_time
+from optimizer_mintime import optimize_routes_partitioned, minutes_to_time
 from collision_checker import check_and_adjust_collisions
 
+# Fichiers indépendants du nombre de commandes : données mémoïsées entre deux appels
+STATIC_FILES = ('warehouse.json', 'products.json', 'agents.json', 'zones_access.json')
 
-def run_optimization(num_orders=10, max_iterations=250):
+
+def _file_stamps(filepaths):
+    """(date de modification, taille) de chaque fichier : la clé change si un fichier change"""
+    return tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, filepaths))
+
+
+@functools.lru_cache(maxsize=1)
+def _load_static_data(stamps):
     """
-    Lance l'optimisation complète et retourne les résultats
+    Charge les données statiques et calcule la matrice des distances, une
+    seule fois tant que les fichiers ne changent pas
     
     Args:
-        num_orders: nombre de commandes à traiter
-        max_iterations: nombre max d'itérations pour résoudre les collisions (défaut: 250)
+        stamps: clé de cache (cf. _file_stamps), non utilisée dans le corps
     
     Returns:
-        dict avec tous les résultats de l'optimisation
+        (warehouse, products, agents, zones_access, distance_data), partagés
+        entre les appels : à ne pas modifier
     """
-    
-    # === CHARGEMENT DES DONNÉES ===
     warehouse = load_warehouse('warehouse.json')
     products = load_products('products.json')
     agents = load_agents('agents.json')
-    orders = load_orders('orders.json')
+    zones_access = load_zones_access('zones_access.json')
     
-    with open('zones_access.json', 'r') as f:
-        zones_access = json.load(f)
-    
-    # === CALCUL DES DISTANCES ===
     navigation_grid = warehouse.get('navigation_grid', None)
     distance_data = calculate_distance_matrix(products, warehouse['entry_point'], navigation_grid)
+    return warehouse, products, agents, zones_access, distance_data
+
+
+def run_optimization(num_orders=10, max_iterations=250, parallel=True):
+    """
+    Lance l'optimisation complète et retourne les résultats
+    
+    Args:
+        num_orders: nombre de commandes à traiter
+        max_iterations: nombre max d'itérations pour résoudre les collisions (défaut: 250)
+        parallel: résoudre les groupes de commandes indépendants dans des processus
+            séparés (cf. optimize_routes_partitioned)
+    
+    Returns:
+        dict avec tous les résultats de l'optimisation
+    """
+    
+    # === CHARGEMENT DES DONNÉES + CALCUL DES DISTANCES (mémoïsés) ===
+    warehouse, products, agents, zones_access, distance_data = _load_static_data(_file_stamps(STATIC_FILES))
+    navigation_grid = warehouse.get('navigation_grid', None)
+    
+    # Commandes relues à chaque appel (fichier susceptible de changer)
+    orders = load_orders('orders.json')
     
     # === SÉLECTION DES COMMANDES ===
     selected_orders = orders[:num_orders]
     
     # === OPTIMISATION OR-TOOLS ===
-    solution = optimize_routes(
+    solution = optimize_routes_partitioned(
         selected_orders, 
         products, 
         agents, 
         distance_data, 
         zones_access,
-        warehouse['entry_point']
+        warehouse['entry_point'],
+        parallel=parallel
     )
     
     if solution['status'] != 'success':
@@ -162,6 +191,7 @@ def run_optimization(num_orders=10, max_iterations=250):
         'collision_result': collision_result,
         'warehouse': warehouse,
         'agents': agents,
+        'agents_by_id': agents_dict,  # Index {agent_id: agent} réutilisé par l'interface
         'distance_data': distance_data
     }
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules du projet importables depuis les tests (et les processus spawn qu'ils lancent)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
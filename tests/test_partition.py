@@ -0,0 +1,65 @@
+"""
+Tests de optimize_routes_partitioned : deux groupes de commandes sans agent
+commun, comparés à une résolution unique par optimize_routes
+"""
+
+import os
+import pytest
+from loader import load_warehouse, load_products, load_agents, load_zones_access
+from distances import calculate_distance_matrix
+from optimizer_mintime import optimize_routes, optimize_routes_partitioned, partition_orders
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _order(order_id, product_ids):
+    return {
+        'id': order_id,
+        'received_time': '08:00',
+        'deadline': '12:00',
+        'priority': 'standard',
+        'items': [{'product_id': pid, 'quantity': 1} for pid in product_ids]
+    }
+
+
+@pytest.fixture(scope='module')
+def instance():
+    """Humain en tête de liste, commandes robots en premier : ordre des groupes ≠ ordre des agents"""
+    warehouse = load_warehouse(os.path.join(ROOT, 'warehouse.json'))
+    products = load_products(os.path.join(ROOT, 'products.json'))
+    agents_by_id = {a['id']: a for a in load_agents(os.path.join(ROOT, 'agents.json'))}
+    zones_access = load_zones_access(os.path.join(ROOT, 'zones_access.json'))
+    
+    agents = [agents_by_id['H1'], agents_by_id['R1'], agents_by_id['R2']]
+    orders = [
+        _order('Robot_1', ['Product_001', 'Product_013']),   # Zone robot : robots seuls
+        _order('Robot_2', ['Product_025']),
+        _order('Human_1', ['Product_052']),                  # Zone humains : humain seul
+        _order('Human_2', ['Product_089'])                   # Alimentaire : humain seul
+    ]
+    distance_data = calculate_distance_matrix(products, warehouse['entry_point'], warehouse.get('navigation_grid'))
+    return orders, products, agents, distance_data, zones_access, warehouse['entry_point']
+
+
+def _picked(solution, agent_ids):
+    return sorted(p['product_id'] for a in agent_ids for p in solution['agents_routes'].get(a, {}).get('products', []))
+
+
+def test_two_disjoint_groups(instance):
+    orders, products, agents, _, zones_access, _ = instance
+    groups = partition_orders(orders, products, agents, zones_access)
+    assert [[o['id'] for o in g] for g in groups] == [['Robot_1', 'Robot_2'], ['Human_1', 'Human_2']]
+
+
+@pytest.mark.parametrize('parallel', [True, False])
+def test_partitioned_matches_single_solve(instance, parallel):
+    single = optimize_routes(*instance)
+    merged = optimize_routes_partitioned(*instance, parallel=parallel, min_parallel_orders=1)
+    
+    assert single['status'] == merged['status'] == 'success'
+    # Même ordre des tournées que optimize_routes (ordre de la liste agents)
+    assert list(merged['agents_routes']) == list(single['agents_routes'])
+    assert list(merged['agents_routes'])[0] == 'H1'
+    assert _picked(merged, ['H1']) == _picked(single, ['H1'])
+    assert _picked(merged, ['R1', 'R2']) == _picked(single, ['R1', 'R2'])
+    assert merged['human_cart_assignments'] == single['human_cart_assignments']
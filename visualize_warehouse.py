@@ -3,8 +3,15 @@ Module de visualisation 2D de l'entrepôt OPTIPICK
 Génère une carte avec matplotlib basée sur l'image fournie
 """
 
-import matplotlib.pyplot as plt
+import functools
+
 import matplotlib.patches as patches
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
+from matplotlib.ticker import MultipleLocator
 import numpy as np
 
 
@@ -23,23 +30,178 @@ COLORS = {
     'entry_gray': '#808080',   # Gris (case entry point)
 }
 
+# Palette des cases (indices de la grille de compute_warehouse_cells)
+# Couleurs opaques équivalentes à l'ancien empilement : case alpha 0.7 sur le fond rose alpha 0.7
+CELL_COLOR_KEYS = ['default', 'passage', 'storage', 'pickup', 'refrigerated',
+                   'preparation', 'entry', 'prep_access', 'entry_gray']
+CELL_ID = {key: code for code, key in enumerate(CELL_COLOR_KEYS)}
+_CELL_BACKGROUND = 0.7 * to_rgba_array(COLORS['default'])[0, :3] + 0.3
+_CELL_RGB = 0.7 * to_rgba_array([COLORS[key] for key in CELL_COLOR_KEYS])[:, :3] + 0.3 * _CELL_BACKGROUND
+_CELL_RGB[CELL_ID['default']] = _CELL_BACKGROUND
+# Le point d'entrée est posé sur la zone entrée/sortie
+_CELL_RGB[CELL_ID['entry_gray']] = 0.7 * to_rgba_array(COLORS['entry_gray'])[0, :3] + 0.3 * _CELL_RGB[CELL_ID['entry']]
+CELL_RGBA = np.column_stack([np.round(_CELL_RGB * 255), np.full(len(CELL_COLOR_KEYS), 255)]).astype(np.uint8)
+
+# Zones dans l'ordre de dessin (du fond vers le haut : la dernière écrite l'emporte)
+ZONE_CELL_IDS = [
+    ('passage', CELL_ID['passage']),
+    ('storage', CELL_ID['storage']),
+    ('pickup', CELL_ID['pickup']),
+    ('refrigerated', CELL_ID['refrigerated']),
+    ('preparation', CELL_ID['preparation']),
+    ('entry_exit', CELL_ID['entry'])
+]
+
+# Cases autour de la zone de préparation [6,5]
+PREP_ACCESS_COORDS = np.array([
+    [5, 4], [6, 4], [7, 4],  # En bas
+    [5, 5], [7, 5],           # Gauche et droite
+    [5, 6], [6, 6], [7, 6]    # En haut
+])
+
+# Bordures des cases : noir alpha 0.7 ; avec la grille, gris alpha 0.5 par-dessus,
+# fusionnés en une seule couleur RGBA (un seul mélange par pixel)
+BORDER_RGBA = np.array([0.0, 0.0, 0.0, 0.7])
+_GRID_ALPHA = 1 - (1 - 0.7) * (1 - 0.5)
+GRID_BORDER_RGBA = np.append(0.5 * to_rgba_array(COLORS['grid'])[0, :3] / _GRID_ALPHA, _GRID_ALPHA)
+
+# Couleurs des trajectoires par type d'agent
+AGENT_COLORS = {
+    'robot': '#FF4444',  # Rouge
+    'human': '#4444FF',  # Bleu
+    'cart': '#FF8800'    # Orange
+}
+AGENT_DEFAULT_COLOR = '#666666'
+
+# Palette RGBA indexée par code de type (dernière ligne = couleur par défaut)
+AGENT_TYPES = np.array(list(AGENT_COLORS))
+AGENT_PALETTE = to_rgba_array(list(AGENT_COLORS.values()) + [AGENT_DEFAULT_COLOR])
+
+
+def agent_colors_rgba(agent_types):
+    """
+    Couleurs RGBA des agents à partir de leurs types, via la palette indexée
+    
+    Args:
+        agent_types: liste des types d'agents (robot, human, cart)
+    
+    Returns:
+        np.ndarray (N, 4) des couleurs RGBA
+    """
+    types = np.asarray(agent_types)
+    codes = np.full(len(types), len(AGENT_TYPES))
+    for code, agent_type in enumerate(AGENT_TYPES):
+        codes[types == agent_type] = code
+    return AGENT_PALETTE[codes]
+
+
+def _paint_cells(grid, coords, cell_id):
+    """Colorie les cases [x, y] de coords comprises dans la grille (les autres sont ignorées)"""
+    coords = np.asarray(coords).reshape(-1, 2)
+    inside = ((coords[:, 0] >= 1) & (coords[:, 0] <= grid.shape[1])
+              & (coords[:, 1] >= 1) & (coords[:, 1] <= grid.shape[0]))
+    grid[coords[inside, 1] - 1, coords[inside, 0] - 1] = cell_id
+
+
+def compute_warehouse_cells(warehouse):
+    """
+    Calcule la grille des cases colorées de l'entrepôt (données pures, sérialisables)
+    
+    Args:
+        warehouse: données de warehouse.json
+    
+    Returns:
+        np.ndarray uint8 (height, width) des indices de CELL_COLOR_KEYS,
+        ligne y-1 et colonne x-1 pour la case [x, y]
+    """
+    width = warehouse['dimensions']['width']
+    height = warehouse['dimensions']['height']
+    
+    # === FOND ROSE POUR TOUTES LES CASES ===
+    grid = np.full((height, width), CELL_ID['default'], dtype=np.uint8)
+    
+    # === ZONES PAR-DESSUS ===
+    zones = warehouse.get('zones', {})
+    
+    for zone_type, cell_id in ZONE_CELL_IDS:
+        if zone_type in zones:
+            # ndarray (N, 2) si chargé par load_warehouse, liste de [x, y] sinon
+            _paint_cells(grid, zones[zone_type]['coords'], cell_id)
+    
+    # === CASES SPÉCIALES (ignorées si hors du plan) ===
+    
+    # 1. Cases autour de la zone de préparation [6,5] en ORANGE
+    _paint_cells(grid, PREP_ACCESS_COORDS, CELL_ID['prep_access'])
+    
+    # 2. Case entry point (ex. [6,10]) en GRIS
+    entry_x, entry_y = warehouse.get('entry_point', [6, 10])
+    _paint_cells(grid, [entry_x, entry_y], CELL_ID['entry_gray'])
+    
+    # 3. Case à droite de l'entry (ex. [7,10]) en ROSE
+    _paint_cells(grid, [entry_x + 1, entry_y], CELL_ID['default'])
+    
+    return grid
+
 
-def create_warehouse_map(warehouse, show_grid=True):
+def warehouse_background(cells):
+    """
+    Image RGBA du fond de plan, une ligne par y et une colonne par x
+    
+    Args:
+        cells: grille de compute_warehouse_cells
+    
+    Returns:
+        np.ndarray uint8 (height, width, 4)
+    """
+    return CELL_RGBA[cells]
+
+
+@functools.lru_cache(maxsize=8)
+def grid_segments(width, height):
+    """
+    Segments des lignes de la grille : height+1 horizontales puis width+1 verticales
+    (calculés une fois par dimensions, tableau partagé en lecture seule)
+    
+    Returns:
+        np.ndarray (width+height+2, 2, 2)
+    """
+    ys = np.arange(height + 1)
+    xs = np.arange(width + 1)
+    hlines = np.stack([np.column_stack([np.zeros_like(ys), ys]), np.column_stack([np.full_like(ys, width), ys])], axis=1)
+    vlines = np.stack([np.column_stack([xs, np.zeros_like(xs)]), np.column_stack([xs, np.full_like(xs, height)])], axis=1)
+    segments = np.concatenate([hlines, vlines])
+    segments.flags.writeable = False
+    return segments
+
+
+def create_warehouse_map(warehouse, show_grid=True, cells=None, ax=None, background=None):
     """
     Crée la carte 2D de l'entrepôt
     
     Args:
         warehouse: données de warehouse.json
         show_grid: afficher la grille (True/False)
+        cells: grille précalculée par compute_warehouse_cells (optionnel)
+        ax: axes matplotlib où dessiner (optionnel, nouvelle figure sinon)
+        background: image précalculée par warehouse_background (optionnel, prioritaire sur cells)
     
     Returns:
-        fig, ax: objets matplotlib
+        fig, ax: objets matplotlib (figure hors pyplot : libérée avec sa dernière référence)
     """
     width = warehouse['dimensions']['width']
     height = warehouse['dimensions']['height']
     
-    # Créer la figure
-    fig, ax = plt.subplots(figsize=(14, 10))
+    if background is None:
+        if cells is None:
+            cells = compute_warehouse_cells(warehouse)
+        background = warehouse_background(cells)
+    
+    # Créer la figure sans passer par pyplot (pas de référence gardée par plt)
+    if ax is None:
+        fig = Figure(figsize=(14, 10))
+        ax = fig.add_subplot(111)
+    else:
+        fig = ax.figure
     ax.set_xlim(0, width)
     ax.set_ylim(0, height)
     ax.set_aspect('equal')
@@ -51,57 +213,31 @@ def create_warehouse_map(warehouse, show_grid=True):
     ax.set_xlabel("X (colonnes)", fontsize=12)
     ax.set_ylabel("Y (lignes)", fontsize=12)
     
-    # Grille si demandée
-    if show_grid:
-        ax.set_xticks(np.arange(0, width+1, 1))
-        ax.set_yticks(np.arange(0, height+1, 1))
-        ax.grid(True, color=COLORS['grid'], linewidth=0.5, alpha=0.5)
+    # === CASES COLORÉES (fond, zones, cases spéciales) : image précalculée ===
+    # Pixel [y-1, x-1] → case [x, y], cellule [x-1, x] × [y-1, y]
+    # (image aussi dans les sorties PDF/SVG ; bordures et trajets restent vectoriels)
+    ax.imshow(
+        background,
+        origin='lower',
+        extent=(0, width, 0, height),
+        interpolation='nearest',
+        zorder=0.5
+    )
     
-    # === FOND ROSE POUR TOUTES LES CASES ===
-    # Dessiner un fond rose par défaut pour toutes les cases
-    for x in range(1, width + 1):
-        for y in range(1, height + 1):
-            rect = patches.Rectangle(
-                (x - 1, y - 1),
-                1, 1,
-                linewidth=0.5,
-                edgecolor='black',
-                facecolor=COLORS['default'],
-                alpha=0.7
-            )
-            ax.add_patch(rect)
-    
-    # === DESSINER LES ZONES PAR-DESSUS ===
-    zones = warehouse.get('zones', {})
+    # === BORDURES DES CASES (et grille si demandée) : un seul LineCollection ===
+    # Transparence portée par la couleur RGBA : pas d'alpha par artiste
+    ax.add_collection(LineCollection(
+        grid_segments(width, height),
+        colors=[GRID_BORDER_RGBA if show_grid else BORDER_RGBA],
+        linewidths=0.5,
+        snap=True,  # Segments horizontaux/verticaux : alignés sur les pixels sans test par chemin
+        zorder=1
+    ))
     
-    # Ordre de dessin (du fond vers le haut)
-    zone_order = ['passage', 'storage', 'pickup', 'refrigerated', 'preparation', 'entry_exit']
-    zone_color_map = {
-        'passage': COLORS['passage'],
-        'storage': COLORS['storage'],
-        'pickup': COLORS['pickup'],
-        'refrigerated': COLORS['refrigerated'],
-        'preparation': COLORS['preparation'],
-        'entry_exit': COLORS['entry']
-    }
-    
-    for zone_type in zone_order:
-        if zone_type in zones:
-            color = zone_color_map.get(zone_type, '#FFFFFF')
-            coords = zones[zone_type]['coords']
-            
-            for coord in coords:
-                x, y = coord
-                # Convertir coordonnées: [x, y] → rectangle à (x-1, y-1)
-                rect = patches.Rectangle(
-                    (x - 1, y - 1),
-                    1, 1,
-                    linewidth=0.5,
-                    edgecolor='black',
-                    facecolor=color,
-                    alpha=0.7
-                )
-                ax.add_patch(rect)
+    if show_grid:
+        # Une graduation par case, générée au dessin par le locator
+        ax.xaxis.set_major_locator(MultipleLocator(1))
+        ax.yaxis.set_major_locator(MultipleLocator(1))
     
     # === ZONE ROBOT ONLY - ENCADRÉ EN POINTILLÉS ===
     # Zone robot complète : X de 0 à 3 inclus, Y de 0 à 6 inclus
@@ -140,51 +276,6 @@ def create_warehouse_map(warehouse, show_grid=True):
         bbox=dict(boxstyle='round', facecolor='white', alpha=0.7, edgecolor='none')
     )
     
-    # === CASES SPÉCIALES ===
-    
-    # 1. Cases autour de la zone de préparation [6,5] en ORANGE
-    prep_access_coords = [
-        [5, 4], [6, 4], [7, 4],  # En bas
-        [5, 5], [7, 5],           # Gauche et droite
-        [5, 6], [6, 6], [7, 6]    # En haut
-    ]
-    
-    for coord in prep_access_coords:
-        x, y = coord
-        rect = patches.Rectangle(
-            (x - 1, y - 1),
-            1, 1,
-            linewidth=0.5,
-            edgecolor='black',
-            facecolor=COLORS['prep_access'],
-            alpha=0.7
-        )
-        ax.add_patch(rect)
-    
-    # 2. Case entry point [6,10] en GRIS
-    entry_coord = [6, 10]
-    rect = patches.Rectangle(
-        (entry_coord[0] - 1, entry_coord[1] - 1),
-        1, 1,
-        linewidth=0.5,
-        edgecolor='black',
-        facecolor=COLORS['entry_gray'],
-        alpha=0.7
-    )
-    ax.add_patch(rect)
-    
-    # 3. Case à droite de l'entry [7,10] en ROSE
-    right_entry_coord = [7, 10]
-    rect = patches.Rectangle(
-        (right_entry_coord[0] - 1, right_entry_coord[1] - 1),
-        1, 1,
-        linewidth=0.5,
-        edgecolor='black',
-        facecolor=COLORS['default'],
-        alpha=0.7
-    )
-    ax.add_patch(rect)
-    
     # === ENTRY POINT ===
     entry = warehouse.get('entry_point', [6, 10])
     ax.plot(
@@ -212,6 +303,105 @@ def create_warehouse_map(warehouse, show_grid=True):
     return fig, ax
 
 
+def trajectory_array(trajectory):
+    """
+    Trajectoire compacte : positions entières dans l'ordre chronologique
+    
+    Args:
+        trajectory: dict {minute: [x, y]} ou np.ndarray (T, 2) indexé par
+            minute (lignes -1 = minutes hors trajet, cf. collision_checker)
+    
+    Returns:
+        np.ndarray int16 (M, 2)
+    """
+    if isinstance(trajectory, np.ndarray):
+        return trajectory[trajectory[:, 0] != -1].astype(np.int16, copy=False)
+    # Minutes et positions lues d'un bloc, puis remises dans l'ordre chronologique
+    times = np.fromiter(trajectory.keys(), dtype=np.int64, count=len(trajectory))
+    positions = np.fromiter((v for pos in trajectory.values() for v in pos), dtype=np.int16,
+                            count=2 * len(trajectory)).reshape(-1, 2)
+    return positions[np.argsort(times, kind='stable')]
+
+
+def trajectory_points(trajectory):
+    """
+    Positions d'une trajectoire en coordonnées matplotlib (centre des cases)
+    
+    Args:
+        trajectory: dict {minute: [x, y]} ou np.ndarray (M, 2) (cf. trajectory_array)
+    
+    Returns:
+        np.ndarray float32 (M, 2) dans l'ordre chronologique
+    """
+    return trajectory_array(trajectory).astype(np.float32) - 0.5
+
+
+def trajectory_segments(points):
+    """Segments consécutifs (M-1, 2, 2) d'une polyligne de points (M, 2)"""
+    return np.stack([points[:-1], points[1:]], axis=1)
+
+
+def add_markers(ax, starts, ends, colors, depot_points=None, depot_colors=None):
+    """
+    Marqueurs de départ ●, d'arrivée ★ et de dépôts ◆ de plusieurs agents,
+    un seul scatter par type de marqueur
+    
+    Args:
+        ax: axes matplotlib
+        starts: np.ndarray (N, 2) positions de départ (coordonnées matplotlib)
+        ends: np.ndarray (N, 2) positions d'arrivée
+        colors: np.ndarray (N, 4) RGBA des agents
+        depot_points: np.ndarray (D, 2) positions de dépôt (optionnel)
+        depot_colors: np.ndarray (D, 4) RGBA des dépôts
+    """
+    # Marquer le départ (cercle ●)
+    ax.scatter(
+        starts[:, 0], starts[:, 1],
+        marker='o',
+        s=10 ** 2,  # markersize 10
+        color=colors,
+        edgecolors='black',
+        linewidths=1.5,
+        zorder=10
+    )
+    
+    # Marquer l'arrivée (étoile ★) - toujours à l'entry point maintenant
+    ax.scatter(
+        ends[:, 0], ends[:, 1],
+        marker='*',
+        s=14 ** 2,  # markersize 14
+        color=colors,
+        edgecolors='black',
+        linewidths=1.5,
+        zorder=10
+    )
+    
+    # Marquer les dépôts (losange ◆)
+    if depot_points is not None and len(depot_points):
+        ax.scatter(
+            depot_points[:, 0], depot_points[:, 1],
+            marker='D',  # Losange/diamant
+            s=10 ** 2,  # markersize 10
+            color=depot_colors,
+            edgecolors='black',
+            linewidths=1.5,
+            zorder=10,
+            alpha=0.9
+        )
+
+
+def depot_points_array(depot_positions):
+    """Positions de dépôt [(x, y), ...] en coordonnées matplotlib, np.ndarray float32 (D, 2)"""
+    return np.asarray(depot_positions or [], dtype=np.float32).reshape(-1, 2) - 0.5
+
+
+def add_trajectory_markers(ax, points, color, depot_positions=None):
+    """Marqueurs de départ ●, d'arrivée ★ et de dépôts ◆ d'un agent"""
+    rgba = to_rgba_array(color)
+    depot_points = depot_points_array(depot_positions)
+    add_markers(ax, points[:1], points[-1:], rgba, depot_points, np.repeat(rgba, len(depot_points), axis=0))
+
+
 def add_agent_trajectory(ax, trajectory, agent_id, agent_type, color='red', alpha=0.6, depot_positions=None):
     """
     Ajoute la trajectoire d'un agent sur la carte
@@ -219,73 +409,74 @@ def add_agent_trajectory(ax, trajectory, agent_id, agent_type, color='red', alph
     
     Args:
         ax: axes matplotlib
-        trajectory: dict {minute: [x, y]}
+        trajectory: dict {minute: [x, y]} ou np.ndarray (M, 2)
         agent_id: ID de l'agent
         agent_type: type d'agent (robot, human, cart)
         color: couleur de la trajectoire
         alpha: transparence
-        depot_positions: liste des positions de dépôt [[x,y], ...] pour cet agent
+        depot_positions: liste des positions de dépôt [(x, y), ...] pour cet agent
     """
-    if not trajectory:
+    if len(trajectory) == 0:
         return
     
-    # Extraire les positions dans l'ordre chronologique
-    times = sorted(trajectory.keys())
-    positions = [trajectory[t] for t in times]
-    
-    if not positions:
-        return
+    points = trajectory_points(trajectory)
     
-    # Convertir en coordonnées matplotlib (centrer sur les cases)
-    x_coords = [p[0] - 0.5 for p in positions]
-    y_coords = [p[1] - 0.5 for p in positions]
-    
-    # Tracer la trajectoire
-    ax.plot(
-        x_coords, y_coords,
-        color=color,
-        linewidth=2.5,
+    # Tracer la trajectoire (un seul LineCollection)
+    ax.add_collection(LineCollection(
+        trajectory_segments(points),
+        colors=color,
+        linewidths=2.5,
         alpha=alpha,
-        label=f'{agent_id} ({agent_type})',
-        marker='.',
-        markersize=2
-    )
+        label=f'{agent_id} ({agent_type})'
+    ))
     
-    # Marquer le départ (cercle ●)
-    ax.plot(
-        x_coords[0], y_coords[0],
-        marker='o',
-        markersize=10,
-        color=color,
-        markeredgecolor='black',
-        markeredgewidth=1.5,
-        zorder=10
-    )
+    add_trajectory_markers(ax, points, color, depot_positions)
+
+
+def add_agents_trajectories(ax, trajectories, colors, alpha=0.6, depot_positions_all=None):
+    """
+    Ajoute les trajectoires de plusieurs agents en un seul LineCollection
     
-    # Marquer l'arrivée (étoile ★) - toujours à l'entry point maintenant
-    ax.plot(
-        x_coords[-1], y_coords[-1],
-        marker='*',
-        markersize=14,
-        color=color,
-        markeredgecolor='black',
-        markeredgewidth=1.5,
-        zorder=10
-    )
+    Args:
+        ax: axes matplotlib
+        trajectories: dict {agent_id: {minute: [x, y]} ou np.ndarray (M, 2)}
+        colors: np.ndarray (N, 4) RGBA, aligné sur l'ordre de trajectories (cf. agent_colors_rgba)
+        alpha: transparence
+        depot_positions_all: dict {agent_id: [(x, y), ...]} positions de dépôt
+    """
+    depot_positions_all = depot_positions_all or {}
+    agent_ids = list(trajectories)
     
-    # Marquer les dépôts (losange ◆)
-    if depot_positions:
-        for depot_pos in depot_positions:
-            ax.plot(
-                depot_pos[0] - 0.5, depot_pos[1] - 0.5,
-                marker='D',  # Losange/diamant
-                markersize=10,
-                color=color,
-                markeredgecolor='black',
-                markeredgewidth=1.5,
-                zorder=10,
-                alpha=0.9
-            )
+    # Toutes les positions bout à bout ; offsets[k]:offsets[k+1] = agent k
+    arrays = [trajectory_array(trajectories[agent_id]) for agent_id in agent_ids]
+    lengths = np.array([len(arr) for arr in arrays], dtype=np.intp)
+    if not lengths.any():
+        return
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    points = np.concatenate(arrays).astype(np.float32) - 0.5
+    
+    # Segments consécutifs, sauf ceux qui relient la fin d'un agent au début du suivant
+    segments = trajectory_segments(points)
+    segment_agent = np.repeat(np.arange(len(agent_ids)), lengths)[:-1]
+    keep = np.ones(len(segments), dtype=bool)
+    boundaries = offsets[1:-1] - 1
+    keep[boundaries[(boundaries >= 0) & (boundaries < len(segments))]] = False  # Agents vides en tête / en fin
+    
+    # Toutes les polylignes en un seul appel de dessin
+    ax.add_collection(LineCollection(
+        segments[keep],
+        colors=colors[segment_agent[keep]],
+        linewidths=2.5,
+        alpha=alpha
+    ))
+    
+    # Marqueurs de tous les agents : un scatter par type de marqueur
+    drawn = np.flatnonzero(lengths)
+    depots = [depot_points_array(depot_positions_all.get(agent_ids[k], [])) for k in drawn]
+    add_markers(
+        ax, points[offsets[drawn]], points[offsets[drawn + 1] - 1], colors[drawn],
+        np.concatenate(depots), np.repeat(colors[drawn], [len(d) for d in depots], axis=0)
+    )
 
 
 def create_legend_patch(color, label):
@@ -293,21 +484,29 @@ def create_legend_patch(color, label):
     return patches.Patch(facecolor=color, edgecolor='black', label=label, alpha=0.7)
 
 
+# Entrées de la légende des zones (couleur, libellé)
+LEGEND_SPEC = [
+    ('entry_gray', 'Point de départ / arrivé'),
+    ('preparation', 'Préparation commandes'),
+    ('prep_access', 'Dépôt des articles'),
+    ('refrigerated', 'Zone réfrigérée'),
+    ('pickup', 'Zone de pick-up'),
+    ('storage', 'Stockage produit'),
+    ('default', 'Zone de passage (rose)'),
+    ('robot_zone', 'ZONE ROBOT ONLY'),
+]
+
+# Patches créés une seule fois : chaque légende en copie les propriétés
+LEGEND_HANDLES = [
+    create_legend_patch(color, label)
+    for color, (_, label) in zip(to_rgba_array([COLORS[key] for key, _ in LEGEND_SPEC]), LEGEND_SPEC)
+]
+
+
 def add_warehouse_legend(ax):
     """Ajoute la légende des zones de l'entrepôt"""
-    legend_elements = [
-        create_legend_patch(COLORS['entry_gray'], 'Point de départ / arrivé'),
-        create_legend_patch(COLORS['preparation'], 'Préparation commandes'),
-        create_legend_patch(COLORS['prep_access'], 'Dépôt des articles'),
-        create_legend_patch(COLORS['refrigerated'], 'Zone réfrigérée'),
-        create_legend_patch(COLORS['pickup'], 'Zone de pick-up'),
-        create_legend_patch(COLORS['storage'], 'Stockage produit'),
-        create_legend_patch(COLORS['default'], 'Zone de passage (rose)'),
-        create_legend_patch(COLORS['robot_zone'], 'ZONE ROBOT ONLY'),
-    ]
-    
     ax.legend(
-        handles=legend_elements,
+        handles=LEGEND_HANDLES,
         loc='upper left',
         bbox_to_anchor=(1.02, 1),
         fontsize=10,
@@ -317,19 +516,150 @@ def add_warehouse_legend(ax):
     )
 
 
+def _blend_pixels(img, rows, cols, rgba, alpha):
+    """Mélange une couleur RGBA (0-1) sur des pixels distincts de img, en place"""
+    flat = np.unique(rows * img.shape[1] + cols)
+    rows, cols = np.divmod(flat, img.shape[1])
+    color = np.asarray(rgba[:3], dtype=np.float32) * 255
+    img[rows, cols, :3] = np.round(alpha * color + (1 - alpha) * img[rows, cols, :3]).astype(np.uint8)
+
+
+def warehouse_raster(warehouse, cell_px=40, trajectories=None, colors=None, alpha=0.6,
+                     line_px=3, background=None):
+    """
+    Image RGBA de la carte calculée directement en NumPy, sans figure matplotlib
+    (exports en lot : fond, bordures et trajectoires ; ni légende ni marqueurs)
+    
+    Args:
+        warehouse: données de warehouse.json
+        cell_px: taille d'une case en pixels
+        trajectories: dict {agent_id: {minute: [x, y]} ou np.ndarray (M, 2)} (optionnel)
+        colors: np.ndarray (N, 4) RGBA, aligné sur l'ordre de trajectories (cf. agent_colors_rgba) ;
+                par défaut AGENT_DEFAULT_COLOR pour tous les agents
+        alpha: transparence des trajectoires
+        line_px: épaisseur des trajectoires en pixels
+        background: image précalculée par warehouse_background (optionnel)
+    
+    Returns:
+        np.ndarray uint8 (height*cell_px, width*cell_px, 4), première ligne = haut du plan
+    """
+    if background is None:
+        background = warehouse_background(compute_warehouse_cells(warehouse))
+    height, width = background.shape[:2]
+    
+    # Chaque case devient un bloc cell_px × cell_px, y croissant vers le haut
+    img = np.repeat(np.repeat(background[::-1], cell_px, axis=0), cell_px, axis=1)
+    
+    # Bordures des cases (cf. BORDER_RGBA)
+    lines_at = np.r_[0:height * cell_px:cell_px, height * cell_px - 1]
+    img[lines_at, :, :3] = np.round(img[lines_at, :, :3] * (1 - BORDER_RGBA[3])).astype(np.uint8)
+    lines_at = np.r_[0:width * cell_px:cell_px, width * cell_px - 1]
+    img[:, lines_at, :3] = np.round(img[:, lines_at, :3] * (1 - BORDER_RGBA[3])).astype(np.uint8)
+    
+    # Trajectoires : points échantillonnés à chaque pixel le long des segments
+    trajectories = trajectories or {}
+    if colors is None:
+        colors = agent_colors_rgba([None] * len(trajectories))  # Types inconnus -> couleur par défaut
+    half = line_px // 2
+    for k, trajectory in enumerate(trajectories.values()):
+        points = trajectory_array(trajectory)
+        if len(points) < 2:
+            continue
+        pixels = np.column_stack([
+            (height - points[:, 1] + 0.5) * cell_px,  # ligne (centre de la case)
+            (points[:, 0] - 0.5) * cell_px            # colonne
+        ])
+        steps = np.abs(np.diff(points.astype(np.intp), axis=0)).max(axis=1) * cell_px
+        counts = steps + 1
+        segment = np.repeat(np.arange(len(steps)), counts)
+        rank = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        t = (rank / np.maximum(steps, 1)[segment])[:, None]
+        samples = np.round(pixels[segment] + (pixels[segment + 1] - pixels[segment]) * t).astype(np.intp)
+        
+        # Épaisseur : décalages carrés autour de chaque échantillon
+        offsets = np.arange(-half, line_px - half)
+        rows, cols = np.broadcast_arrays(
+            (samples[:, 0, None, None] + offsets[None, :, None]),
+            (samples[:, 1, None, None] + offsets[None, None, :])
+        )
+        rows = np.clip(rows.ravel(), 0, img.shape[0] - 1)
+        cols = np.clip(cols.ravel(), 0, img.shape[1] - 1)
+        _blend_pixels(img, rows, cols, colors[k], alpha)
+    
+    return img
+
+
+def save_warehouse_png(path, warehouse, **kwargs):
+    """Enregistre warehouse_raster en PNG (arguments nommés transmis à warehouse_raster)"""
+    imsave(path, warehouse_raster(warehouse, **kwargs))
+
+
+class WarehouseRenderer:
+    """
+    Rendu répété de trajectoires (relecture, animation) sur un plan statique
+    
+    Le plan (cases, zone robot, légende) est dessiné une seule fois et ses pixels
+    mémorisés ; chaque image restaure ces pixels puis ne dessine que les trajectoires.
+    """
+    
+    def __init__(self, warehouse, show_grid=True, background=None, legend=True):
+        """
+        Args:
+            warehouse: données de warehouse.json
+            show_grid: afficher la grille (True/False)
+            background: image précalculée par warehouse_background (optionnel)
+            legend: ajouter la légende des zones
+        """
+        self.fig, self.ax = create_warehouse_map(warehouse, show_grid=show_grid, background=background)
+        if legend:
+            add_warehouse_legend(self.ax)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.canvas.draw()
+        self._static = self.canvas.copy_from_bbox(self.ax.bbox)
+    
+    def frame(self, trajectories, colors, alpha=0.6, depot_positions_all=None):
+        """
+        Image du plan avec les trajectoires données (cf. add_agents_trajectories)
+        
+        Returns:
+            np.ndarray uint8 (H, W, 4) RGBA de la figure entière
+        """
+        self.canvas.restore_region(self._static)
+        
+        num_static = len(self.ax.collections)
+        add_agents_trajectories(self.ax, trajectories, colors, alpha=alpha, depot_positions_all=depot_positions_all)
+        dynamic = self.ax.collections[num_static:]
+        for artist in dynamic:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+        image = np.array(self.canvas.buffer_rgba())
+        
+        # Trajectoires retirées : l'image suivante repart du plan seul
+        for artist in dynamic:
+            artist.remove()
+        return image
+
+
 # === TEST ===
 if __name__ == "__main__":
     import json
+    import sys
     
     # Charger warehouse
     with open('warehouse.json', 'r') as f:
         warehouse = json.load(f)
     
+    if '--raster' in sys.argv:
+        # Image NumPy directe, sans matplotlib (exports en lot)
+        save_warehouse_png('warehouse_map_test.png', warehouse)
+        print("✓ Carte générée (raster) : warehouse_map_test.png")
+        sys.exit(0)
+    
     # Créer la carte
     fig, ax = create_warehouse_map(warehouse, show_grid=True)
     add_warehouse_legend(ax)
     
-    plt.tight_layout()
-    plt.savefig('warehouse_map_test.png', dpi=150, bbox_inches='tight')
+    fig.tight_layout()
+    fig.savefig('warehouse_map_test.png', dpi=150, bbox_inches='tight')
     print("✓ Carte générée : warehouse_map_test.png")
-    plt.show()
\ No newline at end of file
+    del fig, ax
\ No newline at end of file